@@ -0,0 +1,208 @@
+"""
+Admission control / load shedding (ASGI middleware)
+
+ช่วงคนเยอะ request หนัก ๆ (dashboard, /sales/ ทั้งหมด, รายงานข้ามสาขา) แย่ง threadpool
+และเวลา DB จาก create_sale ทำให้คิดเงินช้า middleware นี้:
+
+- จัด request เป็น class ตาม route (ROUTE_CLASSES) แต่ละ class มี priority,
+  max_concurrency (พร้อมกันได้กี่ตัว), max_queue (รอได้กี่ตัว), queue_timeout
+- มีเพดานรวม total_concurrency ที่ทุก class ใช้ร่วมกัน เมื่อมีที่ว่าง
+  คิวที่ priority สูงกว่า (เลขน้อยกว่า) ได้ก่อน → checkout แซง dashboard เสมอ
+- คิวเต็มหรือรอนานเกิน queue_timeout → ตอบ 503 + Retry-After ทันที (shed)
+- metrics() คืนจำนวน admitted / queued / shed / timed_out / in_flight / waiting ต่อ class
+
+ปรับค่าได้ด้วย env POS_ADMISSION_LIMITS (JSON) เช่น
+    {"total_concurrency": 16, "heavy": {"max_concurrency": 1, "max_queue": 2}}
+จำกัดเฉพาะ route: ประกาศ class ใหม่ (ค่าที่ไม่ระบุเอาจาก "default") แล้วผูก route ด้วย "routes"
+(ตรวจก่อน ROUTE_CLASSES จึง override ของเดิมได้; class เป็น null = ไม่ผ่าน admission)
+    {"reports": {"priority": 2, "max_concurrency": 1},
+     "routes": [["GET", "^/stores/sales$", "reports"]]}
+ปิดทั้งหมดด้วย POS_ADMISSION=0
+"""
+import asyncio
+import heapq
+import itertools
+import json
+import os
+import re
+import time
+
+DEFAULT_TOTAL_CONCURRENCY = 32
+
+# ชื่อ class → ค่าตั้งต้น (priority น้อย = สำคัญกว่า)
+DEFAULT_CLASSES = {
+    "checkout": {"priority": 0, "max_concurrency": 16, "max_queue": 64, "queue_timeout": 5.0, "retry_after": 1},
+    "default":  {"priority": 1, "max_concurrency": 8,  "max_queue": 32, "queue_timeout": 3.0, "retry_after": 2},
+    "heavy":    {"priority": 2, "max_concurrency": 2,  "max_queue": 4,  "queue_timeout": 2.0, "retry_after": 5},
+}
+
+# (method, regex ของ path, class) — ตัวแรกที่ตรงชนะ, None = ไม่ผ่าน admission (health check ฯลฯ)
+ROUTE_CLASSES = [
+    ("GET", r"^/$", None),
+    ("GET", r"^/health$", None),
+    ("GET", r"^/admission/metrics$", None),
+    ("POST", r"^/sales/$", "checkout"),
+    ("POST", r"^/quote$", "checkout"),
+    ("GET", r"^/dashboard/", "heavy"),
+    ("GET", r"^/sales/$", "heavy"),
+    ("GET", r"^/stores/", "heavy"),
+]
+
+
+class Shed(Exception):
+    def __init__(self, cls_name: str, reason: str):
+        super().__init__(reason)
+        self.cls_name = cls_name
+        self.reason = reason
+
+
+class AdmissionController:
+    def __init__(self, classes=None, total_concurrency: int = DEFAULT_TOTAL_CONCURRENCY, routes=None):
+        self.classes = {name: dict(cfg) for name, cfg in (classes or DEFAULT_CLASSES).items()}
+        self.total_concurrency = total_concurrency
+        self.routes = [(m, re.compile(p), c) for m, p, c in (routes or ROUTE_CLASSES)]
+        self.in_flight_total = 0
+        self._in_flight = dict.fromkeys(self.classes, 0)
+        self._waiting = dict.fromkeys(self.classes, 0)
+        self._waiters = []   # heap ของ (priority, seq, class, future)
+        self._seq = itertools.count()
+        self._stats = {name: {"admitted": 0, "queued": 0, "shed": 0, "timed_out": 0, "max_wait_ms": 0.0}
+                       for name in self.classes}
+
+    @classmethod
+    def from_env(cls):
+        return cls.from_config(json.loads(os.getenv("POS_ADMISSION_LIMITS", "{}")))
+
+    @classmethod
+    def from_config(cls, overrides: dict):
+        overrides = dict(overrides)
+        total = overrides.pop("total_concurrency", DEFAULT_TOTAL_CONCURRENCY)
+        extra_routes = [tuple(route) for route in overrides.pop("routes", [])]
+        classes = {name: dict(cfg) for name, cfg in DEFAULT_CLASSES.items()}
+        for name, cfg in overrides.items():
+            classes[name] = {**classes.get(name, DEFAULT_CLASSES["default"]), **cfg}
+        for method, pattern, cls_name in extra_routes:
+            if cls_name is not None and cls_name not in classes:
+                raise ValueError(f"route {method} {pattern}: unknown admission class {cls_name!r}")
+        return cls(classes, total, extra_routes + ROUTE_CLASSES)
+
+    def classify(self, method: str, path: str):
+        for m, pattern, cls_name in self.routes:
+            if m == method and pattern.search(path):
+                return cls_name
+        return "default"
+
+    def _can_run(self, cls_name: str) -> bool:
+        return (self.in_flight_total < self.total_concurrency
+                and self._in_flight[cls_name] < self.classes[cls_name]["max_concurrency"])
+
+    def _grant(self, cls_name: str):
+        self.in_flight_total += 1
+        self._in_flight[cls_name] += 1
+        self._stats[cls_name]["admitted"] += 1
+
+    def _dispatch(self):
+        """ให้ที่ว่างกับคิวตามลำดับ priority (class ที่เต็มเพดานตัวเองถูกข้ามไปชั่วคราว)"""
+        skipped = []
+        while self._waiters and self.in_flight_total < self.total_concurrency:
+            item = heapq.heappop(self._waiters)
+            _, _, cls_name, future = item
+            if future.done():          # หมดเวลาไปแล้ว
+                continue
+            if not self._can_run(cls_name):
+                skipped.append(item)
+                continue
+            self._waiting[cls_name] -= 1
+            self._grant(cls_name)
+            future.set_result(None)
+        for item in skipped:
+            heapq.heappush(self._waiters, item)
+
+    async def acquire(self, cls_name: str):
+        cfg = self.classes[cls_name]
+        if self._can_run(cls_name):
+            self._grant(cls_name)
+            return
+        if self._waiting[cls_name] >= cfg["max_queue"]:
+            self._stats[cls_name]["shed"] += 1
+            raise Shed(cls_name, "queue full")
+
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (cfg["priority"], next(self._seq), cls_name, future))
+        self._waiting[cls_name] += 1
+        self._stats[cls_name]["queued"] += 1
+        started = time.perf_counter()
+        try:
+            await asyncio.wait_for(asyncio.shield(future), cfg["queue_timeout"])
+        except asyncio.TimeoutError:
+            if future.done():      # ได้ที่พอดีกับตอนหมดเวลา → ใช้ที่นั้นต่อ
+                return
+            future.cancel()
+            self._waiting[cls_name] -= 1
+            self._stats[cls_name]["timed_out"] += 1
+            self._stats[cls_name]["shed"] += 1
+            raise Shed(cls_name, "queue timeout")
+        except asyncio.CancelledError:
+            # client ตัดการเชื่อมต่อระหว่างรอ → คืนที่ (ถ้าได้แล้ว) หรือออกจากคิว
+            if future.done() and not future.cancelled():
+                self.release(cls_name)
+            else:
+                future.cancel()
+                self._waiting[cls_name] -= 1
+            raise
+        finally:
+            wait_ms = (time.perf_counter() - started) * 1000
+            stats = self._stats[cls_name]
+            stats["max_wait_ms"] = round(max(stats["max_wait_ms"], wait_ms), 1)
+
+    def release(self, cls_name: str):
+        self.in_flight_total -= 1
+        self._in_flight[cls_name] -= 1
+        self._dispatch()
+
+    def metrics(self) -> dict:
+        return {
+            "total_concurrency": self.total_concurrency,
+            "in_flight": self.in_flight_total,
+            "classes": {
+                name: {**self._stats[name], "in_flight": self._in_flight[name], "waiting": self._waiting[name],
+                       "max_concurrency": cfg["max_concurrency"], "max_queue": cfg["max_queue"]}
+                for name, cfg in self.classes.items()
+            },
+        }
+
+
+class AdmissionMiddleware:
+    def __init__(self, app, controller: AdmissionController):
+        self.app = app
+        self.controller = controller
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        cls_name = self.controller.classify(scope["method"], scope["path"])
+        if cls_name is None:
+            return await self.app(scope, receive, send)
+
+        try:
+            await self.controller.acquire(cls_name)
+        except Shed as shed:
+            return await self._reject(shed, send)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.controller.release(cls_name)
+
+    async def _reject(self, shed: Shed, send):
+        retry_after = str(self.controller.classes[shed.cls_name]["retry_after"])
+        body = json.dumps({"detail": f"Server busy ({shed.reason}), retry later", "class": shed.cls_name}).encode()
+        await send({
+            "type": "http.response.start",
+            "status": 503,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", retry_after.encode()),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
@@ -0,0 +1,129 @@
+"""
+Benchmark: cold start (import main → startup → request แรก) ใน process ใหม่ทุกครั้ง
+
+จำลองการตื่นจาก sleep ของ Render free plan: ทุกรอบเปิด python process ใหม่
+ใช้สำเนาของฐานข้อมูล (ค่าเริ่มต้น: DB ชั่วคราวที่ seed สินค้าไว้) ไม่แตะ pos.db
+
+DB ที่ seed มีประวัติการขาย (ค่าเริ่มต้น 100,000 รายการ) → งาน migration ตอน startup ที่เผลอ
+scan ตาราง sale ทุกครั้งจะโผล่ในตัวเลข
+
+budget วัดเทียบกับ baseline บนเครื่องเดียวกัน: process ที่ import fastapi/sqlmodel แล้วรัน app เปล่า
+(ค่าที่ Python + framework ใช้อยู่แล้ว) → overhead = total ของ main - total ของ baseline
+ต้องไม่เกิน COLD_START_BUDGET_MS (ค่าเริ่มต้น 500; วัดได้ราว 250-300 ms) ไม่ขึ้นกับว่าเครื่องช้าหรือเร็ว
+
+รัน:  python bench_cold_start.py [จำนวนรอบ]
+exit code 1 ถ้า median ของ overhead เกิน budget
+"""
+import json
+import os
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+
+COLD_START_BUDGET_MS = float(os.getenv("COLD_START_BUDGET_MS", "500"))
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+# โค้ดที่รันใน process ลูก: จับเวลาแต่ละช่วงแล้วพิมพ์เป็น JSON
+CHILD = r"""
+import json, time
+from fastapi.testclient import TestClient  # ไม่นับเวลา import ของ test client
+t0 = time.perf_counter()
+import main
+t1 = time.perf_counter()
+with TestClient(main.app) as client:
+    t2 = time.perf_counter()
+    status = client.get("/products/").status_code
+    t3 = time.perf_counter()
+    ms = lambda a, b: round((b - a) * 1000, 1)
+    print(json.dumps({
+        "import_ms": ms(t0, t1),
+        "startup_ms": ms(t1, t2),
+        "first_request_ms": ms(t2, t3),
+        "total_ms": ms(t0, t3),
+        "status": status,
+        "app_timings": main.STARTUP_TIMINGS,
+    }))
+"""
+
+# baseline: import framework + app เปล่าหนึ่ง route วัดช่วงเดียวกัน
+BASELINE_CHILD = r"""
+import json, time
+from fastapi.testclient import TestClient
+t0 = time.perf_counter()
+import fastapi, sqlmodel
+app = fastapi.FastAPI()
+app.get("/")(lambda: [])
+t1 = time.perf_counter()
+with TestClient(app) as client:
+    t2 = time.perf_counter()
+    status = client.get("/").status_code
+    t3 = time.perf_counter()
+    ms = lambda a, b: round((b - a) * 1000, 1)
+    print(json.dumps({"import_ms": ms(t0, t1), "startup_ms": ms(t1, t2),
+                      "first_request_ms": ms(t2, t3), "total_ms": ms(t0, t3), "status": status}))
+"""
+
+
+def seed_db(path: str, products: int = 2000, sales: int = 100_000):
+    """DB ที่มีสินค้าเยอะพอให้ seed หมวดหมู่ใช้เวลาจริง และมีประวัติการขาย"""
+    con = sqlite3.connect(path)
+    con.executescript("""
+        CREATE TABLE product (id INTEGER PRIMARY KEY, name VARCHAR NOT NULL, sku VARCHAR NOT NULL,
+            category VARCHAR NOT NULL, price FLOAT NOT NULL, cost_price FLOAT NOT NULL,
+            stock INTEGER NOT NULL, image VARCHAR, has_vat BOOLEAN DEFAULT 0);
+        CREATE TABLE sale (id INTEGER PRIMARY KEY, product_id INTEGER NOT NULL, product_name VARCHAR NOT NULL,
+            quantity INTEGER NOT NULL, total_price FLOAT NOT NULL, created_at DATETIME NOT NULL);
+    """)
+    con.executemany(
+        "INSERT INTO product (name, sku, category, price, cost_price, stock) VALUES (?, ?, ?, 100, 80, 5)",
+        [(f"P{i}", f"SKU{i}", f"Cat{i % 50}") for i in range(products)],
+    )
+    con.executemany(
+        "INSERT INTO sale (product_id, product_name, quantity, total_price, created_at) "
+        "VALUES (?, ?, 1, 100, '2024-01-01 10:00:00')",
+        [(i % products + 1, f"P{i % products}") for i in range(sales)],
+    )
+    con.commit()
+    con.close()
+
+
+def measure_cold_start(db_file: str, child: str = CHILD) -> dict:
+    env = {**os.environ, "POS_DB_FILE": db_file, "PYTHONDONTWRITEBYTECODE": "0"}
+    out = subprocess.run(
+        [sys.executable, "-c", child], cwd=HERE, env=env, capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def measure_baseline() -> dict:
+    return measure_cold_start(os.devnull, BASELINE_CHILD)
+
+
+def run(rounds: int = 5) -> dict:
+    keys = ("import_ms", "startup_ms", "first_request_ms", "total_ms")
+    with tempfile.TemporaryDirectory() as tmp:
+        db_file = os.path.join(tmp, "pos.db")
+        seed_db(db_file)
+        measure_cold_start(db_file)  # รอบแรก: migration + สร้าง .pyc (ไม่นับ)
+        runs = [measure_cold_start(db_file) for _ in range(rounds)]
+    baselines = [measure_baseline() for _ in range(rounds)]
+    result = {k: statistics.median(r[k] for r in runs) for k in keys}
+    result["baseline_ms"] = statistics.median(b["total_ms"] for b in baselines)
+    result["overhead_ms"] = round(result["total_ms"] - result["baseline_ms"], 1)
+    return result
+
+
+def main():
+    rounds = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    result = run(rounds)
+    for key, value in result.items():
+        print(f"{key:<18} {value:8.1f} ms (median of {rounds})")
+    ok = result["overhead_ms"] <= COLD_START_BUDGET_MS
+    print(f"overhead budget {COLD_START_BUDGET_MS:.0f} ms: {'✅ OK' if ok else '❌ EXCEEDED'}")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
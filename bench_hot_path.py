@@ -0,0 +1,127 @@
+"""
+Benchmark: latency ต่อ request ของ hot path แบบ ORM (เดิม) เทียบกับ Core + RETURNING (fast_path.py)
+
+วัดตรงที่ฟังก์ชันจัดการข้อมูล (ไม่ผ่าน HTTP) ทีละคำสั่ง thread เดียว:
+create_sale, update_product, delete_sale แล้วพิมพ์ median / p95 เป็นไมโครวินาที
+
+รัน:  python bench_hot_path.py [จำนวนรอบ]
+ใช้ฐานข้อมูลชั่วคราว ไม่แตะ pos.db
+"""
+import os
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+from sqlmodel import SQLModel, Session, create_engine
+
+import fast_path
+from models import Product, Sale
+from pricing import to_satang
+
+
+def make_engine(path):
+    engine = create_engine(f"sqlite:///{path}", connect_args={"check_same_thread": False})
+    SQLModel.metadata.create_all(engine)
+    with Session(engine) as session:
+        session.add(Product(id=1, name="Fan", sku="FAN1", category="Fan", price=990.0, cost_price=700.0,
+                            stock=10**9))
+        session.commit()
+    return engine
+
+
+def new_sale():
+    return Sale(product_id=1, product_name="Fan", quantity=1, total_price=990.0)
+
+
+# --- ORM: เหมือน route เดิมใน main.py ---
+
+def orm_create_sale(engine, sale):
+    with Session(engine) as session:
+        product = session.get(Product, sale.product_id)
+        product.stock -= sale.quantity
+        session.add(product)
+        sale.created_at = datetime.now()
+        sale.total_price_satang = to_satang(sale.total_price)
+        session.add(sale)
+        session.commit()
+        session.refresh(sale)
+        return sale.model_dump()
+
+
+def orm_update_product(engine, product_id, values):
+    with Session(engine) as session:
+        product = session.get(Product, product_id)
+        for key, value in values.items():
+            setattr(product, key, value)
+        product.price_satang = to_satang(product.price)
+        product.cost_price_satang = to_satang(product.cost_price)
+        session.add(product)
+        session.commit()
+        session.refresh(product)
+        return product.model_dump()
+
+
+def orm_delete_sale(engine, sale_id):
+    with Session(engine) as session:
+        sale = session.get(Sale, sale_id)
+        product = session.get(Product, sale.product_id)
+        product.stock += sale.quantity
+        session.add(product)
+        session.delete(sale)
+        session.commit()
+
+
+IMPLEMENTATIONS = {
+    "orm": (orm_create_sale, orm_update_product, orm_delete_sale),
+    "core": (fast_path.create_sale, fast_path.update_product, fast_path.delete_sale),
+}
+
+
+def _timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, (time.perf_counter() - start) * 1e6
+
+
+def measure(engine, impl, rounds):
+    create_sale, update_product, delete_sale = impl
+    timings = {"create_sale": [], "update_product": [], "delete_sale": []}
+    for i in range(rounds):
+        sale, us = _timed(create_sale, engine, new_sale())
+        timings["create_sale"].append(us)
+        _, us = _timed(update_product, engine, 1, {"price": 990.0 + i % 7, "stock": 10**9})
+        timings["update_product"].append(us)
+        _, us = _timed(delete_sale, engine, sale["id"])
+        timings["delete_sale"].append(us)
+    return {
+        op: {"median_us": statistics.median(v), "p95_us": statistics.quantiles(v, n=20)[-1]}
+        for op, v in timings.items()
+    }
+
+
+def run(rounds=2000):
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, impl in IMPLEMENTATIONS.items():
+            engine = make_engine(os.path.join(tmp, f"{name}.db"))
+            measure(engine, impl, 50)  # warm-up: connection pool + compiled cache
+            results[name] = measure(engine, impl, rounds)
+            engine.dispose()
+    return results
+
+
+def main():
+    rounds = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    results = run(rounds)
+    print(f"rounds={rounds}  (µs ต่อ request, thread เดียว)")
+    print(f"{'operation':<15} {'orm median':>11} {'core median':>12} {'orm p95':>9} {'core p95':>9}  speedup")
+    for op in results["orm"]:
+        orm, core = results["orm"][op], results["core"][op]
+        print(f"{op:<15} {orm['median_us']:>11.0f} {core['median_us']:>12.0f} "
+              f"{orm['p95_us']:>9.0f} {core['p95_us']:>9.0f}  x{orm['median_us'] / core['median_us']:.1f}")
+
+
+if __name__ == "__main__":
+    main()
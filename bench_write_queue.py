@@ -0,0 +1,77 @@
+"""
+Benchmark: create_sale แบบ commit ทีละ request เทียบกับ group-commit (SaleWriteQueue)
+
+รัน:  python bench_write_queue.py [จำนวน sale] [จำนวน thread]
+ใช้ฐานข้อมูลชั่วคราว ไม่แตะ pos.db
+"""
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from sqlmodel import SQLModel, Session, create_engine
+
+from models import Product, Sale
+from write_queue import SaleWriteQueue
+
+
+def make_engine(path):
+    engine = create_engine(f"sqlite:///{path}", connect_args={"check_same_thread": False, "timeout": 30})
+    SQLModel.metadata.create_all(engine)
+    with Session(engine) as session:
+        session.add(Product(id=1, name="Fan", sku="FAN1", category="Fan", price=990.0, cost_price=700.0, stock=10**9))
+        session.commit()
+    return engine
+
+
+def sale_per_request(engine):
+    # เหมือน create_sale เดิมใน main.py
+    def create_sale(_):
+        sale = Sale(product_id=1, product_name="Fan", quantity=1, total_price=990.0)
+        with Session(engine) as session:
+            product = session.get(Product, sale.product_id)
+            product.stock -= sale.quantity
+            session.add(product)
+            session.add(sale)
+            session.commit()
+            session.refresh(sale)
+            return sale
+    return create_sale
+
+
+def sale_group_commit(q):
+    def create_sale(_):
+        return q.create_sale(Sale(product_id=1, product_name="Fan", quantity=1, total_price=990.0))
+    return create_sale
+
+
+def run(fn, n, threads):
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        list(pool.map(fn, range(n)))
+    return n / (time.perf_counter() - start)
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    threads = int(sys.argv[2]) if len(sys.argv) > 2 else 32
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = make_engine(os.path.join(tmp, "per_request.db"))
+        base = run(sale_per_request(engine), n, threads)
+        engine.dispose()
+
+        engine = make_engine(os.path.join(tmp, "group_commit.db"))
+        q = SaleWriteQueue(engine)
+        q.start()
+        grouped = run(sale_group_commit(q), n, threads)
+        q.stop()
+        engine.dispose()
+
+    print(f"sales={n} threads={threads}")
+    print(f"per-request commit : {base:8.0f} sales/s")
+    print(f"group commit       : {grouped:8.0f} sales/s  ({q.commits} commits, x{grouped / base:.1f})")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,20 +1,12 @@
-import sqlite3
+"""
+ลบสินค้าทดสอบ (name LIKE 'Test%' / sku LIKE 'TEST%') ทุกสาขา — ตัวห่อของ maintenance.delete_test_products
+"""
+import maintenance
 
 def delete_test_data():
-    conn = sqlite3.connect('pos.db')
-    cursor = conn.cursor()
-    
-    # Deleting the specific TEST999 item seen in output
-    cursor.execute("DELETE FROM product WHERE sku = 'TEST999'")
-    
-    # Also delete any other obvious test data if any
-    cursor.execute("DELETE FROM product WHERE name LIKE 'Test%' OR sku LIKE 'TEST%'")
-    
-    deleted_count = cursor.rowcount
-    conn.commit()
-    conn.close()
-    
-    print(f"Deleted {deleted_count} test items.")
+    results = maintenance.run_per_store(maintenance.delete_test_products, dry_run=False)
+    for store_id, result in results.items():
+        print(f"Store {store_id}: deleted {result['affected']} test items.")
 
 if __name__ == "__main__":
     delete_test_data()
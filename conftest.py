@@ -0,0 +1,44 @@
+"""
+fixture กลางของชุดทดสอบ: ชี้ main ไปที่ DB ชั่วคราวและรีเซ็ต state ระดับ module ทั้งหมด
+(engine, สาขา, group-commit, admission) ไม่ให้ env ของเครื่อง เช่น POS_STORES /
+POS_GROUP_COMMIT / POS_ADMISSION ทำให้ test รันกับแอปที่ patch ไม่ครบ
+"""
+import pytest
+from fastapi.testclient import TestClient
+from sqlmodel import create_engine
+
+import main
+from stores import DEFAULT_STORE_ID, StoreEngines
+
+
+@pytest.fixture
+def pos_db(tmp_path, monkeypatch):
+    """factory: pos_db(db_file=None, store_ids=(1,)) → path ของ DB หลักที่ main ใช้"""
+    engines = []
+
+    def configure(db_file=None, store_ids=(DEFAULT_STORE_ID,)):
+        db_file = db_file or str(tmp_path / "pos.db")
+        engine = create_engine(f"sqlite:///{db_file}", connect_args=main.connect_args)
+        store_engines = StoreEngines(main._make_store_engine)
+        engines.extend([engine, store_engines])
+        monkeypatch.setattr(main, "engine", engine)
+        monkeypatch.setattr(main, "sqlite_file_name", db_file)
+        monkeypatch.setattr(main, "STORE_IDS", list(store_ids))
+        monkeypatch.setattr(main, "store_engines", store_engines)
+        monkeypatch.setattr(main, "GROUP_COMMIT", False)
+        monkeypatch.setattr(main, "sale_queues", {})
+        monkeypatch.delenv("POS_ADMISSION", raising=False)
+        monkeypatch.delenv("POS_ADMISSION_LIMITS", raising=False)
+        monkeypatch.setattr(main, "app", main.create_app())
+        return db_file
+
+    yield configure
+    for engine in engines:
+        engine.dispose()
+
+
+@pytest.fixture
+def client(pos_db):
+    pos_db()
+    with TestClient(main.app) as client:
+        yield client
@@ -0,0 +1,19 @@
+"""
+ข้อมูลตั้งต้น (หมวดหมู่ / แบรนด์มาตรฐาน) ใช้ร่วมกันระหว่าง main.seed_defaults และ maintenance.py
+"""
+
+DEFAULT_CATEGORIES = [
+    {"name": "Tv",              "thai": "โทรทัศน์",       "image": "https://images.unsplash.com/photo-1717295248230-93ea71f48f92?w=600&auto=format&fit=crop&q=60"},
+    {"name": "Fan",             "thai": "พัดลม",           "image": "https://media.istockphoto.com/id/1150705585/th/รูปถ่าย/ภาพระยะใกล้ของพัดลมตั้งพื้นไฟฟ้า.jpg?s=612x612&w=0&k=20&c=vX1hV1muUVa96MZpx4jJd6Ujl54pQX6Z8eIyyrdkLvw="},
+    {"name": "Refrigerator",    "thai": "ตู้เย็น",          "image": "https://images.unsplash.com/photo-1584568694244-14fbdf83bd30?w=600&auto=format&fit=crop&q=60"},
+    {"name": "Washing Machine", "thai": "เครื่องซักผ้า",   "image": "https://images.unsplash.com/photo-1626806787461-102c1bfaaea1?w=600&auto=format&fit=crop&q=60"},
+]
+
+DEFAULT_BRANDS = [
+    {"name": "Samsung"},
+    {"name": "LG"},
+    {"name": "Mitsubishi"},
+    {"name": "Sharp"},
+    {"name": "Hitachi"},
+    {"name": "Panasonic"},
+]
@@ -0,0 +1,240 @@
+"""
+Export product / sale / category / brand เป็นไฟล์คอลัมน์ (Parquet หรือ Arrow IPC) สำหรับงาน BI
+
+แทนการดึง /sales/ หรือรัน dump_all_data.py บนฐานข้อมูลจริง:
+- อ่านแบบ read-only ทีละ batch (keyset: WHERE id > ? ORDER BY id LIMIT ?) หน่วยความจำคงที่
+  และไม่ถือ read transaction ยาว
+- sale export แบบ incremental: จำ id ล่าสุดของแต่ละสาขาไว้ใน <out>/_export_state.json
+  รอบถัดไปเขียนเฉพาะแถวใหม่เป็น part file ใหม่ (sale.id เป็น AUTOINCREMENT → ไม่ถูก reuse
+  หลังลบบิล watermark จึงไม่ถอยหลัง)
+- sale ถูกลบได้ (DELETE /sales/{id}, maintenance) → trigger เก็บ tombstone ใน sale_void
+  ซึ่ง export แบบ incremental เหมือนกัน ฝั่ง BI ตัด sale ที่มี sale_id อยู่ใน sale_void ออก
+  หรือ --full เพื่อสร้างใหม่จากข้อมูลปัจจุบันทั้งหมด
+- product / category / brand มีการแก้ไขได้ → เขียน snapshot ใหม่ทับทุกรอบ (ข้อมูลน้อย)
+- product / sale อ่านจากทุกสาขา (stores.STORE_IDS) แยกโฟลเดอร์ store_<id>
+
+ต้องติดตั้ง pyarrow (ไม่ได้อยู่ใน requirements.txt เพราะ server ไม่ต้องใช้):
+    pip install pyarrow
+
+ใช้งาน:
+    python export.py exports/                       # parquet, incremental
+    python export.py exports/ --format arrow
+    python export.py exports/ --tables sale,sale_void --full  # เริ่ม sale ใหม่ทั้งหมด
+"""
+import argparse
+import json
+import os
+import pathlib
+import shutil
+import sqlite3
+
+from sqlalchemy import Boolean, DateTime, Float, Integer
+
+from models import Brand, Category, Product, Sale, SaleVoid
+from stores import STORE_IDS, store_db_file
+
+DB_PATH = os.getenv("POS_DB_FILE", "pos.db")
+DEFAULT_BATCH_SIZE = 5000
+STATE_FILE = "_export_state.json"
+
+# table → (model, mode, แยกตามสาขาหรือไม่)
+TABLES = {
+    "product": (Product, "snapshot", True),
+    "sale": (Sale, "append", True),
+    "sale_void": (SaleVoid, "append", True),
+    "category": (Category, "snapshot", False),
+    "brand": (Brand, "snapshot", False),
+}
+
+
+def _require_pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.compute
+        import pyarrow.ipc
+        import pyarrow.parquet
+    except ImportError as e:
+        raise RuntimeError("export ต้องใช้ pyarrow: pip install pyarrow") from e
+    return pyarrow
+
+
+def _arrow_type(pa, column):
+    if isinstance(column.type, Boolean):
+        return pa.bool_()
+    if isinstance(column.type, Integer):
+        return pa.int64()
+    if isinstance(column.type, Float):
+        return pa.float64()
+    if isinstance(column.type, DateTime):
+        return pa.timestamp("us")
+    return pa.string()
+
+
+def _connect_ro(db_file: str) -> sqlite3.Connection:
+    # as_uri() escape ?, #, % ในชื่อไฟล์ให้ (ประกอบ f"file:{path}" เองจะเปิดผิดไฟล์)
+    return sqlite3.connect(pathlib.Path(db_file).resolve().as_uri() + "?mode=ro", uri=True)
+
+
+def _columns(con, model):
+    """คอลัมน์ของ model ที่มีจริงใน DB (DB เก่าอาจยังไม่ migrate บางคอลัมน์)"""
+    table = model.__table__
+    existing = {row[1] for row in con.execute(f"PRAGMA table_info({table.name})")}
+    return [c for c in table.columns if c.name in existing]
+
+
+def _to_batch(pa, schema, columns, rows):
+    arrays = []
+    for i, (column, field) in enumerate(zip(columns, schema)):
+        values = [row[i] for row in rows]
+        if pa.types.is_timestamp(field.type):
+            # SQLite เก็บ datetime เป็นข้อความ ISO → cast เป็น timestamp ทั้งคอลัมน์ทีเดียว
+            arrays.append(pa.compute.cast(pa.array(values, pa.string()), field.type))
+        elif pa.types.is_boolean(field.type):
+            arrays.append(pa.array([None if v is None else bool(v) for v in values], field.type))
+        else:
+            arrays.append(pa.array(values, field.type))
+    return pa.RecordBatch.from_arrays(arrays, schema=schema)
+
+
+class _Writer:
+    def __init__(self, pa, path, schema, fmt):
+        self.pa, self.path, self.schema, self.fmt = pa, path, schema, fmt
+        self._writer = None
+
+    def write(self, batch):
+        if self._writer is None:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            if self.fmt == "parquet":
+                self._writer = self.pa.parquet.ParquetWriter(self.path, self.schema, compression="zstd")
+            else:
+                self._writer = self.pa.ipc.new_file(self.path, self.schema)
+        if self.fmt == "parquet":
+            self._writer.write_batch(batch)
+        else:
+            self._writer.write(batch)
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+
+
+def export_table(db_file, model, out_path, fmt="parquet", after_id=0, batch_size=DEFAULT_BATCH_SIZE,
+                 progress=None) -> dict:
+    """
+    stream แถวที่ id > after_id ลงไฟล์เดียวทีละ batch คืนค่า {"rows", "last_id", "path"}
+    ไม่มีแถวใหม่ → ไม่สร้างไฟล์ (path = None)
+    """
+    pa = _require_pyarrow()
+    con = _connect_ro(db_file)
+    try:
+        columns = _columns(con, model)
+        if not columns:  # DB เก่าที่ยังไม่มีตารางนี้
+            return {"rows": 0, "last_id": after_id, "path": None}
+        schema = pa.schema([pa.field(c.name, _arrow_type(pa, c)) for c in columns])
+        names = ", ".join(c.name for c in columns)
+        id_index = [c.name for c in columns].index("id")
+        sql = f"SELECT {names} FROM {model.__table__.name} WHERE id > ? ORDER BY id LIMIT ?"
+
+        tmp_path = out_path + ".tmp"
+        writer = _Writer(pa, tmp_path, schema, fmt)
+        rows_written, last_id = 0, after_id
+        try:
+            while True:
+                rows = con.execute(sql, (last_id, batch_size)).fetchall()
+                if not rows:
+                    break
+                writer.write(_to_batch(pa, schema, columns, rows))
+                rows_written += len(rows)
+                last_id = rows[-1][id_index]
+                if progress:
+                    progress(model.__table__.name, rows_written)
+        finally:
+            writer.close()
+    finally:
+        con.close()
+
+    if not rows_written:
+        return {"rows": 0, "last_id": after_id, "path": None}
+    os.replace(tmp_path, out_path)  # เขียนเสร็จแล้วค่อยเปลี่ยนชื่อ → ผู้อ่านไม่เห็นไฟล์ครึ่ง ๆ
+    return {"rows": rows_written, "last_id": last_id, "path": out_path}
+
+
+def _load_state(out_dir):
+    path = os.path.join(out_dir, STATE_FILE)
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _save_state(out_dir, state):
+    path = os.path.join(out_dir, STATE_FILE)
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(state, f, indent=2)
+    os.replace(path + ".tmp", path)
+
+
+def run_export(out_dir, tables=None, fmt="parquet", full=False, batch_size=DEFAULT_BATCH_SIZE,
+               db_path=DB_PATH, store_ids=None, progress=None) -> dict:
+    """export ทุกตารางที่เลือก คืนค่า {"sale": {"store_1": {...}}, ...}"""
+    ext = "parquet" if fmt == "parquet" else "arrow"
+    store_ids = store_ids or STORE_IDS
+    os.makedirs(out_dir, exist_ok=True)
+    state = _load_state(out_dir)
+    summary = {}
+
+    for name in tables or TABLES:
+        model, mode, per_store = TABLES[name]
+        sources = [(f"store_{sid}", store_db_file(db_path, sid)) for sid in store_ids] if per_store else [("", db_path)]
+        table_state = {} if full else state.get(name, {})
+        if full:
+            shutil.rmtree(os.path.join(out_dir, name), ignore_errors=True)
+        summary[name] = {}
+
+        for key, db_file in sources:
+            if not os.path.exists(db_file):
+                continue
+            target_dir = os.path.join(out_dir, name, key) if key else os.path.join(out_dir, name)
+            if mode == "append":
+                after_id = table_state.get(key or name, 0)
+                out_path = os.path.join(target_dir, f"part-{after_id + 1:010d}.{ext}")
+            else:
+                after_id = 0
+                out_path = os.path.join(target_dir, f"snapshot.{ext}")
+            result = export_table(db_file, model, out_path, fmt, after_id, batch_size, progress)
+            if mode == "snapshot" and not result["rows"] and os.path.exists(out_path):
+                os.remove(out_path)  # ตารางว่างแล้ว → ไม่ทิ้ง snapshot เก่าไว้
+            if mode == "append":
+                table_state[key or name] = result["last_id"]
+            summary[name][key or name] = result
+
+        if mode == "append":
+            state[name] = table_state
+            _save_state(out_dir, state)   # บันทึกหลังแต่ละตาราง: ล้มกลางทางก็ไม่ export ซ้ำ
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export POS tables to Parquet / Arrow")
+    parser.add_argument("out_dir")
+    parser.add_argument("--format", choices=["parquet", "arrow"], default="parquet")
+    parser.add_argument("--tables", default=",".join(TABLES), help="เช่น sale,product")
+    parser.add_argument("--full", action="store_true", help="ไม่ใช้ state เดิม export sale / sale_void ใหม่ทั้งหมด")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument("--db", default=DB_PATH)
+    args = parser.parse_args(argv)
+
+    tables = [t.strip() for t in args.tables.split(",") if t.strip()]
+    unknown = set(tables) - set(TABLES)
+    if unknown:
+        parser.error(f"unknown tables: {sorted(unknown)}")
+
+    summary = run_export(args.out_dir, tables, args.format, args.full, args.batch_size, args.db)
+    for name, parts in summary.items():
+        for key, result in parts.items():
+            print(f"{name:<9} {key:<9} rows={result['rows']:<8} last_id={result['last_id']:<8} {result['path'] or '-'}")
+    return summary
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""
+Hot path ของ checkout: create_sale / update_product / delete_sale ด้วย SQLAlchemy Core
+
+ทางเดิมใช้ ORM Session: session.get → แก้ object → commit → session.refresh
+เป็น 3-4 คำสั่งต่อ request บวกค่า identity map / unit of work / expire ทุกครั้ง
+
+ที่นี่:
+- statement สร้างครั้งเดียวตอน import ด้วย bindparam → SQLAlchemy ใช้ compiled cache
+  ของ engine ได้ทุก request ไม่ต้องสร้าง/คำนวณ cache key ของ statement ใหม่
+- ใช้ RETURNING (SQLite >= 3.35) ได้แถวที่เขียนกลับมาในคำสั่งเดียว ไม่ต้อง refresh
+- ตัดสต๊อกแบบมีเงื่อนไข (stock >= :quantity) ใน UPDATE เดียว ไม่มีช่องว่างระหว่างอ่านกับเขียน
+  เช็คว่าสินค้ามีอยู่ไหมเฉพาะตอนตัดไม่สำเร็จ (เพื่อแยก 404 กับ 400)
+
+ผลลัพธ์เป็น dict ตามคอลัมน์ของตาราง → JSON ที่ตอบกลับหน้าตาเหมือน Sale / Product เดิม
+(RETURNING อาจคืนค่า REAL ที่เป็นจำนวนเต็มเป็น int จึงแปลงคอลัมน์ Float เป็น float ก่อนคืน)
+"""
+from datetime import datetime
+
+from fastapi import HTTPException
+from sqlalchemy import Float, bindparam, delete, insert, select, update
+
+from models import Product, Sale
+from pricing import to_satang
+
+product_table = Product.__table__
+sale_table = Sale.__table__
+
+
+def _float_columns(table) -> tuple:
+    return tuple(c.name for c in table.columns if isinstance(c.type, Float))
+
+
+_FLOAT_COLUMNS = {product_table.name: _float_columns(product_table), sale_table.name: _float_columns(sale_table)}
+
+
+def _as_dict(table, row) -> dict:
+    """แถวจาก RETURNING → dict ตามชนิดที่ประกาศใน model (100 → 100.0 เหมือนที่ ORM คืน)"""
+    data = dict(row._mapping)
+    for name in _FLOAT_COLUMNS[table.name]:
+        if data[name] is not None:
+            data[name] = float(data[name])
+    return data
+
+_DECREMENT_STOCK = (
+    update(product_table)
+    .where(product_table.c.id == bindparam("product_id"))
+    .where(product_table.c.stock >= bindparam("quantity"))
+    .values(stock=product_table.c.stock - bindparam("quantity"))
+    .returning(product_table.c.id)
+)
+_RESTORE_STOCK = (
+    update(product_table)
+    .where(product_table.c.id == bindparam("product_id"))
+    .values(stock=product_table.c.stock + bindparam("quantity"))
+)
+_PRODUCT_EXISTS = select(product_table.c.id).where(product_table.c.id == bindparam("product_id"))
+_SELECT_PRODUCT = select(product_table).where(product_table.c.id == bindparam("product_id"))
+# ไม่มี .values(): SET มาจาก key ของ parameter ที่ส่งตอน execute (compiled cache แยกตามชุดคอลัมน์เอง)
+_UPDATE_PRODUCT = (
+    update(product_table)
+    .where(product_table.c.id == bindparam("product_id"))
+    .returning(*product_table.c)
+)
+_INSERT_SALE = insert(sale_table).returning(*sale_table.c)
+_DELETE_SALE = (
+    delete(sale_table)
+    .where(sale_table.c.id == bindparam("sale_id"))
+    .returning(sale_table.c.product_id, sale_table.c.quantity)
+)
+
+# คอลัมน์ที่ PUT /products/{id} แก้ได้ (id / store_id / *_satang ไม่รับจาก client)
+PRODUCT_EDITABLE = ("name", "sku", "category", "price", "cost_price", "stock", "image", "has_vat")
+
+
+def insert_sale(conn, sale: Sale) -> dict:
+    """ตัดสต๊อก + บันทึก sale ใน transaction ของ conn คืนแถว sale (raise HTTPException ถ้าไม่ผ่าน)"""
+    decremented = conn.execute(
+        _DECREMENT_STOCK, {"product_id": sale.product_id, "quantity": sale.quantity}
+    ).first()
+    if decremented is None:
+        if conn.execute(_PRODUCT_EXISTS, {"product_id": sale.product_id}).first() is None:
+            raise HTTPException(status_code=404, detail="Product not found")
+        raise HTTPException(status_code=400, detail="Not enough stock")
+
+    row = conn.execute(_INSERT_SALE, {
+        "product_id": sale.product_id,
+        "product_name": sale.product_name,
+        "quantity": sale.quantity,
+        "total_price": sale.total_price,
+        "total_price_satang": to_satang(sale.total_price),
+        "created_at": datetime.now(),
+        "store_id": sale.store_id,
+    }).one()
+    return _as_dict(sale_table, row)
+
+
+def create_sale(engine, sale: Sale) -> dict:
+    with engine.begin() as conn:
+        return insert_sale(conn, sale)
+
+
+def update_product(engine, product_id: int, values: dict) -> dict:
+    """แก้เฉพาะคอลัมน์ที่ส่งมา คำนวณ *_satang ใหม่ถ้าราคาเปลี่ยน คืนแถวหลังแก้"""
+    values = {k: v for k, v in values.items() if k in PRODUCT_EDITABLE}
+    if "price" in values:
+        values["price_satang"] = to_satang(values["price"])
+    if "cost_price" in values:
+        values["cost_price_satang"] = to_satang(values["cost_price"])
+
+    with engine.begin() as conn:
+        if values:
+            row = conn.execute(_UPDATE_PRODUCT, {**values, "product_id": product_id}).first()
+        else:
+            row = conn.execute(_SELECT_PRODUCT, {"product_id": product_id}).first()
+    if row is None:
+        raise HTTPException(status_code=404, detail="Product not found")
+    return _as_dict(product_table, row)
+
+
+def delete_sale(engine, sale_id: int) -> None:
+    """ลบ sale แล้วคืนสต๊อกให้สินค้า (ถ้าสินค้ายังอยู่)"""
+    with engine.begin() as conn:
+        row = conn.execute(_DELETE_SALE, {"sale_id": sale_id}).first()
+        if row is None:
+            raise HTTPException(status_code=404, detail="Sale not found")
+        conn.execute(_RESTORE_STOCK, {"product_id": row.product_id, "quantity": row.quantity})
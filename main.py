@@ -1,72 +1,108 @@
-# --- ROOT ENDPOINT ---
-from fastapi import FastAPI
-from datetime import datetime
-from typing import Optional
-from fastapi import HTTPException, Request
-from fastapi.responses import JSONResponse
-from sqlmodel import SQLModel, Session, create_engine, select
-from pydantic import BaseModel
-from models import Product, Sale, Category, Brand
-from fastapi.middleware.cors import CORSMiddleware
-import traceback
-import sqlite3
-
-app = FastAPI()
-
-# --- ROOT ENDPOINT ---
-
-@app.get("/")
-def root():
-    return {"message": "Stock API is running"}
-
-from fastapi import FastAPI
-
-app = FastAPI()   # ต้องมีบรรทัดนี้ก่อนเสมอ
-
-@app.get("/")
-def root():
-    return {"message": "Stock API is running"}
+# --- Stock API (FastAPI + SQLite) ---
+# วัดเวลา import ตั้งแต่บรรทัดแรก (ดู /health และ bench_cold_start.py)
+import time
+_import_started = time.perf_counter()
 
+import os
+import sqlite3
+import threading
+import traceback
+from contextlib import asynccontextmanager
 from datetime import datetime
-from typing import Optional
-from fastapi import HTTPException, Request
+from typing import List, Optional
+
+from fastapi import APIRouter, FastAPI, HTTPException, Request
+from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
-from sqlmodel import SQLModel, Session, create_engine, select
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
+from sqlalchemy.schema import CreateTable
+from sqlmodel import SQLModel, Session, create_engine, select, update
+
+import fast_path
+from admission import AdmissionController, AdmissionMiddleware
+from defaults import DEFAULT_CATEGORIES, DEFAULT_BRANDS
 from models import Product, Sale, Category, Brand
-from fastapi.middleware.cors import CORSMiddleware
-import traceback
-import sqlite3
+from pricing import to_satang, migrate_money_columns, load_prices, quote_basket
+from stores import (
+    DEFAULT_STORE_ID, STORE_IDS, StoreEngines, store_db_file, fan_out,
+    inventory_summary, sales_summary, merge_inventory, merge_sales,
+)
 
 # 1. ตั้งค่า Database (SQLite)
-sqlite_file_name = "pos.db"
+sqlite_file_name = os.getenv("POS_DB_FILE", "pos.db")
 sqlite_url = f"sqlite:///{sqlite_file_name}"
 
 connect_args = {"check_same_thread": False}
 engine = create_engine(sqlite_url, connect_args=connect_args)
 
-def create_db_and_tables():
-    SQLModel.metadata.create_all(engine)
-
-app = FastAPI()
-
-@app.exception_handler(Exception)
-async def global_exception_handler(request: Request, exc: Exception):
-    error_detail = {
-        "error": str(exc),
-        "type": type(exc).__name__,
-        "traceback": traceback.format_exc()
-    }
-    print(f"❌ Error occurred: {error_detail}")
-    return JSONResponse(status_code=500, content=error_detail)
-
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
+# sale ที่ถูกลบ (ยกเลิกบิล, maintenance, ลบด้วยมือ) → เก็บ tombstone ไว้ให้ export ส่งต่อ
+SALE_VOID_TRIGGER = """
+    CREATE TRIGGER IF NOT EXISTS sale_void_on_delete AFTER DELETE ON sale
+    BEGIN
+        INSERT INTO sale_void (sale_id, store_id, voided_at)
+        VALUES (OLD.id, OLD.store_id, datetime('now', 'localtime'));
+    END
+"""
+
+def create_db_and_tables(db_engine=None):
+    db_engine = db_engine or engine
+    SQLModel.metadata.create_all(db_engine)
+    # create_all ไม่สร้าง index ให้ตารางที่มีอยู่แล้ว → สร้างเพิ่มให้ DB เก่า
+    with db_engine.begin() as conn:
+        for table in SQLModel.metadata.sorted_tables:
+            for index in table.indexes:
+                index.create(conn, checkfirst=True)
+        conn.exec_driver_sql(SALE_VOID_TRIGGER)
+
+def migrate_sale_autoincrement(con: sqlite3.Connection) -> bool:
+    """
+    สร้างตาราง sale ใหม่เป็น AUTOINCREMENT (DB เดิมใช้ INTEGER PRIMARY KEY ธรรมดา
+    ซึ่ง SQLite reuse id สูงสุดหลังลบบิลล่าสุด) คืนค่า True ถ้า migrate
+    """
+    row = con.execute("SELECT sql FROM sqlite_master WHERE type='table' AND name='sale'").fetchone()
+    if row is None or "AUTOINCREMENT" in row[0].upper():
+        return False
+    old_cols = {r[1] for r in con.execute("PRAGMA table_info(sale)")}
+    cols = ", ".join(c.name for c in Sale.__table__.columns if c.name in old_cols)
+    indexes = [r[1] for r in con.execute("PRAGMA index_list(sale)") if r[3] == "c"]
+    con.execute("BEGIN")
+    try:
+        con.execute("DROP TRIGGER IF EXISTS sale_void_on_delete")
+        con.execute("ALTER TABLE sale RENAME TO _sale_old")
+        for name in indexes:  # index ถูกสร้างใหม่ใน create_db_and_tables
+            con.execute(f"DROP INDEX {name}")
+        con.execute(str(CreateTable(Sale.__table__).compile(dialect=engine.dialect)))
+        con.execute(f"INSERT INTO sale ({cols}) SELECT {cols} FROM _sale_old ORDER BY id")
+        con.execute("DROP TABLE _sale_old")
+        con.commit()
+    except Exception:
+        con.rollback()
+        raise
+    return True
+
+# 2. สาขา: store 1 ใช้ engine หลัก สาขาอื่นมีไฟล์ DB ของตัวเอง (ดู stores.py)
+def _make_store_engine(store_id: int):
+    db_file = store_db_file(sqlite_file_name, store_id)
+    return create_engine(f"sqlite:///{db_file}", connect_args=connect_args)
+
+store_engines = StoreEngines(_make_store_engine)
+
+def engine_for(store_id: int):
+    if store_id == DEFAULT_STORE_ID:
+        return engine
+    if store_id not in STORE_IDS:
+        raise HTTPException(status_code=404, detail="Store not found")
+    return store_engines.get(store_id)
+
+# 3. Group-commit สำหรับการขาย (เปิดด้วย POS_GROUP_COMMIT=1)
+# รวบ sale ที่เข้ามาใน window สั้น ๆ แล้ว commit เป็น transaction เดียว (หนึ่งคิวต่อสาขา)
+GROUP_COMMIT = os.getenv("POS_GROUP_COMMIT") == "1"
+sale_queues = {}
+
+# 4. เวลา cold start (ms): import, startup (ก่อนรับ request แรก), seed (ทำเบื้องหลัง)
+STARTUP_TIMINGS = {"import_ms": None, "startup_ms": None, "seed_ms": None}
+
+router = APIRouter()
 
 class CategoryCreate(BaseModel):
     name: str
@@ -81,24 +117,15 @@ class CategoryUpdate(BaseModel):
 class BrandCreate(BaseModel):
     name: str
 
-DEFAULT_CATEGORIES = [
-    {"name": "Tv",              "thai": "โทรทัศน์",       "image": "https://images.unsplash.com/photo-1717295248230-93ea71f48f92?w=600&auto=format&fit=crop&q=60"},
-    {"name": "Fan",             "thai": "พัดลม",           "image": "https://media.istockphoto.com/id/1150705585/th/รูปถ่าย/ภาพระยะใกล้ของพัดลมตั้งพื้นไฟฟ้า.jpg?s=612x612&w=0&k=20&c=vX1hV1muUVa96MZpx4jJd6Ujl54pQX6Z8eIyyrdkLvw="},
-    {"name": "Refrigerator",    "thai": "ตู้เย็น",          "image": "https://images.unsplash.com/photo-1584568694244-14fbdf83bd30?w=600&auto=format&fit=crop&q=60"},
-    {"name": "Washing Machine", "thai": "เครื่องซักผ้า",   "image": "https://images.unsplash.com/photo-1626806787461-102c1bfaaea1?w=600&auto=format&fit=crop&q=60"},
-]
-
-DEFAULT_BRANDS = [
-    {"name": "Samsung"},
-    {"name": "LG"},
-    {"name": "Mitsubishi"},
-    {"name": "Sharp"},
-    {"name": "Hitachi"},
-    {"name": "Panasonic"},
-]
-
-@app.on_event("startup")
-def on_startup():
+class QuoteItem(BaseModel):
+    product_id: int
+    quantity: int = Field(gt=0)
+
+class QuoteRequest(BaseModel):
+    items: List[QuoteItem] = Field(min_length=1)
+    store_id: int = DEFAULT_STORE_ID
+
+def migrate_databases():
     # --- Auto-Migration: rename name_th → thai ---
     try:
         con = sqlite3.connect(sqlite_file_name)
@@ -121,12 +148,71 @@ def on_startup():
                 cur.execute("ALTER TABLE category_new RENAME TO category")
                 con.commit()
                 print("✅ Migration เสร็จแล้ว: name_th → thai")
+        # --- Auto-Migration: เพิ่ม store_id ให้ DB เดิม (ข้อมูลเดิมเป็นของ store 1) ---
+        for table in ("product", "sale"):
+            if table in tables:
+                cols = [row[1] for row in cur.execute(f"PRAGMA table_info({table})").fetchall()]
+                if "store_id" not in cols:
+                    cur.execute(f"ALTER TABLE {table} ADD COLUMN store_id INTEGER NOT NULL DEFAULT {DEFAULT_STORE_ID}")
+                    con.commit()
+                    print(f"✅ Migration เสร็จแล้ว: เพิ่ม store_id ใน {table}")
         con.close()
     except Exception as e:
         print(f"⚠️ Migration error (ข้ามได้): {e}")
 
-    create_db_and_tables()
+    # --- Auto-Migration: คอลัมน์เงินแบบสตางค์ + sale AUTOINCREMENT (ทุกสาขา) ---
+    for store_id in STORE_IDS:
+        try:
+            con = sqlite3.connect(store_db_file(sqlite_file_name, store_id))
+            added = migrate_money_columns(con)
+            if added:
+                print(f"✅ Migration เสร็จแล้ว: เพิ่ม {', '.join(added)} (store {store_id})")
+            if migrate_sale_autoincrement(con):
+                print(f"✅ Migration เสร็จแล้ว: sale.id เป็น AUTOINCREMENT (store {store_id})")
+            con.close()
+        except Exception as e:
+            print(f"⚠️ Migration error (ข้ามได้): {e}")
+
+    for store_id in STORE_IDS:
+        create_db_and_tables(engine_for(store_id))
+
+# หมวดหมู่เป็นข้อมูลกลาง (ไฟล์หลัก) แต่ product อยู่ในไฟล์ของแต่ละสาขา → ต้องทำทุก shard
+def rename_product_category(old_name: str, new_name: str) -> dict:
+    """
+    rename หมวดหมู่ในสินค้าทุกสาขา คืนค่า {store_id: [id สินค้าที่เปลี่ยน]}
+    สาขาใดล้ม → คืนชื่อเดิมให้สาขาที่ทำไปแล้ว แล้ว raise (ผู้เรียกยังไม่ต้อง commit category)
+    """
+    renamed = {}
+
+    def rename(store_id):
+        with engine_for(store_id).begin() as conn:
+            renamed[store_id] = conn.execute(
+                update(Product).where(Product.category == old_name).values(category=new_name)
+                .returning(Product.id)
+            ).scalars().all()
 
+    try:
+        fan_out(rename, STORE_IDS)
+    except Exception:
+        restore_product_category(renamed, old_name)
+        raise
+    return renamed
+
+def restore_product_category(renamed: dict, old_name: str):
+    """ย้อนผลของ rename_product_category (เฉพาะสินค้าที่เปลี่ยนไป ไม่แตะสินค้าที่ใช้ชื่อใหม่อยู่ก่อน)"""
+    for store_id, ids in renamed.items():
+        if ids:
+            with engine_for(store_id).begin() as conn:
+                conn.execute(update(Product).where(Product.id.in_(ids)).values(category=old_name))
+
+def product_categories() -> dict:
+    def distinct_categories(store_id):
+        with engine_for(store_id).connect() as conn:
+            return set(conn.execute(select(Product.category).distinct()).scalars())
+    return fan_out(distinct_categories, STORE_IDS)
+
+def seed_defaults():
+    """seed หมวดหมู่มาตรฐาน + sync หมวดหมู่จากสินค้า (ไม่จำเป็นต่อ request แรก → รันเบื้องหลัง)"""
     with Session(engine) as session:
         existing_cats = session.exec(select(Category)).all()
         # ✅ เช็คด้วย lowercase เพื่อกัน duplicate เช่น "TV" vs "Tv"
@@ -134,6 +220,7 @@ def on_startup():
         existing_names_exact = {c.name: c for c in existing_cats}
 
         # 1. Seed DEFAULT_CATEGORIES
+        renames = []
         for d_cat in DEFAULT_CATEGORIES:
             name = d_cat["name"]
             name_lower = name.lower()
@@ -142,28 +229,23 @@ def on_startup():
                 cat_obj = existing_names_lower[name_lower]
                 cat_obj.image = d_cat["image"]
                 if cat_obj.name != name:
-                    # ✅ แก้ชื่อใน product ด้วยถ้าไม่ตรง
-                    old_name = cat_obj.name
-                    products_to_fix = session.exec(
-                        select(Product).where(Product.category == old_name)
-                    ).all()
-                    for p in products_to_fix:
-                        p.category = name
-                        session.add(p)
+                    renames.append((cat_obj.name, name))
                     cat_obj.name = name
                 session.add(cat_obj)
             else:
                 session.add(Category(**d_cat))
 
+        # ✅ แก้ชื่อใน product ด้วยถ้าไม่ตรง (ทุกสาขา) ก่อน commit ชื่อหมวดหมู่
+        for old_name, new_name in renames:
+            rename_product_category(old_name, new_name)
         session.commit()
 
         # Refresh หลัง commit
         existing_cats = session.exec(select(Category)).all()
         existing_names_lower = {c.name.lower(): c for c in existing_cats}
 
-        # 2. ✅ Sync product categories — เช็ค case-insensitive ก่อนเพิ่ม
-        product_cats = session.exec(select(Product.category).distinct()).all()
-        default_names_lower = [d["name"].lower() for d in DEFAULT_CATEGORIES]
+        # 2. ✅ Sync product categories จากทุกสาขา — เช็ค case-insensitive ก่อนเพิ่ม
+        product_cats = sorted(set().union(*product_categories().values()))
 
         for p_cat in product_cats:
             if not p_cat:
@@ -173,14 +255,80 @@ def on_startup():
             if p_cat_lower in existing_names_lower:
                 continue
             # ถ้าไม่มีเลย → เพิ่มใหม่
-            session.add(Category(name=p_cat, thai=p_cat))
+            new_cat = Category(name=p_cat, thai=p_cat)
+            existing_names_lower[p_cat_lower] = new_cat
+            session.add(new_cat)
 
         session.commit()
 
+def _run_seed():
+    started = time.perf_counter()
+    try:
+        seed_defaults()
+    except Exception as e:
+        print(f"⚠️ Seed error (ข้ามได้): {e}")
+    STARTUP_TIMINGS["seed_ms"] = round((time.perf_counter() - started) * 1000, 1)
+
+def start_sale_queues():
+    if not GROUP_COMMIT:
+        return
+    from write_queue import SaleWriteQueue  # import เฉพาะตอนเปิดใช้
+    for store_id in STORE_IDS:
+        sale_queues[store_id] = SaleWriteQueue(
+            engine_for(store_id),
+            window_ms=float(os.getenv("POS_GROUP_COMMIT_WINDOW_MS", "5")),
+            max_batch=int(os.getenv("POS_GROUP_COMMIT_MAX_BATCH", "200")),
+        )
+        sale_queues[store_id].start()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # ส่วนที่ต้องเสร็จก่อนรับ request: migration + ตาราง + คิวการขาย
+    started = time.perf_counter()
+    migrate_databases()
+    start_sale_queues()
+    STARTUP_TIMINGS["seed_ms"] = None
+    app.state.seeder = threading.Thread(target=_run_seed, name="seed", daemon=True)
+    app.state.seeder.start()
+    STARTUP_TIMINGS["startup_ms"] = round((time.perf_counter() - started) * 1000, 1)
+    print(f"🚀 Ready: import {STARTUP_TIMINGS['import_ms']}ms, startup {STARTUP_TIMINGS['startup_ms']}ms")
+    yield
+    app.state.seeder.join()
+    for queue in sale_queues.values():
+        queue.stop()
+    sale_queues.clear()
+    store_engines.dispose()
+
+async def global_exception_handler(request: Request, exc: Exception):
+    error_detail = {
+        "error": str(exc),
+        "type": type(exc).__name__,
+        "traceback": traceback.format_exc()
+    }
+    print(f"❌ Error occurred: {error_detail}")
+    return JSONResponse(status_code=500, content=error_detail)
+
+# --- ROOT ENDPOINT ---
+
+@router.get("/")
+def root():
+    return {"message": "Stock API is running"}
+
+@router.get("/health")
+def health():
+    return {"status": "ok", "seeded": STARTUP_TIMINGS["seed_ms"] is not None, **STARTUP_TIMINGS}
+
+@router.get("/admission/metrics")
+def admission_metrics(request: Request):
+    controller = getattr(request.app.state, "admission", None)
+    if controller is None:
+        return {"enabled": False}
+    return {"enabled": True, **controller.metrics()}
+
 
 # --- PRODUCTS ---
 
-@app.post("/products/")
+@router.post("/products/")
 def create_product(product: Product):
     if product.cost_price is None:
         raise HTTPException(status_code=422, detail="cost_price is required")
@@ -188,34 +336,28 @@ def create_product(product: Product):
         raise HTTPException(status_code=422, detail="price is required")
     if product.stock is None:
         raise HTTPException(status_code=422, detail="stock is required")
-    with Session(engine) as session:
+    product.price_satang = to_satang(product.price)
+    product.cost_price_satang = to_satang(product.cost_price)
+    with Session(engine_for(product.store_id)) as session:
         session.add(product)
         session.commit()
         session.refresh(product)
         return product
 
-@app.get("/products/")
-def read_products():
-    with Session(engine) as session:
+@router.get("/products/")
+def read_products(store_id: int = DEFAULT_STORE_ID):
+    with Session(engine_for(store_id)) as session:
         return session.exec(select(Product)).all()
 
-@app.put("/products/{product_id}")
-def update_product(product_id: int, product_data: Product):
-    with Session(engine) as session:
-        db_product = session.get(Product, product_id)
-        if not db_product:
-            raise HTTPException(status_code=404, detail="Product not found")
-        product_data_dict = product_data.model_dump(exclude_unset=True)
-        for key, value in product_data_dict.items():
-            setattr(db_product, key, value)
-        session.add(db_product)
-        session.commit()
-        session.refresh(db_product)
-        return db_product
+@router.put("/products/{product_id}")
+def update_product(product_id: int, product_data: Product, store_id: int = DEFAULT_STORE_ID):
+    # ย้ายสาขาด้วยการแก้ store_id ไม่ได้ (สินค้าอยู่ในไฟล์ของสาขา) — fast_path แก้เฉพาะคอลัมน์ที่แก้ได้
+    product_data_dict = product_data.model_dump(exclude_unset=True)
+    return fast_path.update_product(engine_for(store_id), product_id, product_data_dict)
 
-@app.delete("/products/{product_id}")
-def delete_product(product_id: int):
-    with Session(engine) as session:
+@router.delete("/products/{product_id}")
+def delete_product(product_id: int, store_id: int = DEFAULT_STORE_ID):
+    with Session(engine_for(store_id)) as session:
         product = session.get(Product, product_id)
         if not product:
             raise HTTPException(status_code=404, detail="Product not found")
@@ -225,60 +367,84 @@ def delete_product(product_id: int):
 
 # --- SALES ---
 
-@app.post("/sales/")
+@router.post("/sales/")
 def create_sale(sale: Sale):
-    with Session(engine) as session:
-        product = session.get(Product, sale.product_id)
-        if not product:
-            raise HTTPException(status_code=404, detail="Product not found")
-        if product.stock < sale.quantity:
-            raise HTTPException(status_code=400, detail="Not enough stock")
-        product.stock -= sale.quantity
-        session.add(product)
-        sale.created_at = datetime.now()
-        session.add(sale)
-        session.commit()
-        session.refresh(sale)
-        return sale
-
-@app.get("/sales/")
-def read_sales():
-    with Session(engine) as session:
+    sale_engine = engine_for(sale.store_id)
+    queue = sale_queues.get(sale.store_id)
+    if queue is not None:
+        return queue.create_sale(sale)
+    return fast_path.create_sale(sale_engine, sale)
+
+@router.get("/sales/")
+def read_sales(store_id: int = DEFAULT_STORE_ID):
+    with Session(engine_for(store_id)) as session:
         return session.exec(select(Sale)).all()
 
-@app.delete("/sales/{sale_id}")
-def delete_sale(sale_id: int):
-    with Session(engine) as session:
-        sale = session.get(Sale, sale_id)
-        if not sale:
-            raise HTTPException(status_code=404, detail="Sale not found")
-        product = session.get(Product, sale.product_id)
-        if product:
-            product.stock += sale.quantity
-            session.add(product)
-        session.delete(sale)
-        session.commit()
-        return {"ok": True}
+@router.delete("/sales/{sale_id}")
+def delete_sale(sale_id: int, store_id: int = DEFAULT_STORE_ID):
+    fast_path.delete_sale(engine_for(store_id), sale_id)
+    return {"ok": True}
+
+# --- QUOTE (คำนวณตะกร้า: ยอดรวม, VAT, กำไร เป็นสตางค์) ---
+
+@router.post("/quote")
+def quote(data: QuoteRequest):
+    items = [(item.product_id, item.quantity) for item in data.items]
+    with engine_for(data.store_id).connect() as conn:
+        prices = load_prices(conn, [pid for pid, _ in items])
+    missing = sorted({pid for pid, _ in items if pid not in prices})
+    if missing:
+        raise HTTPException(status_code=404, detail=f"Product not found: {missing}")
+    return quote_basket(items, prices)
+
+# --- STORES (รายงานรวมทุกสาขา) ---
+
+@router.get("/stores/inventory")
+def cross_store_inventory():
+    per_store = fan_out(lambda store_id: inventory_summary(engine_for(store_id)), STORE_IDS)
+    return merge_inventory(per_store)
+
+@router.get("/stores/sales")
+def cross_store_sales(start: Optional[datetime] = None, end: Optional[datetime] = None):
+    per_store = fan_out(lambda store_id: sales_summary(engine_for(store_id), start, end), STORE_IDS)
+    return merge_sales(per_store)
 
 # --- CATEGORIES ---
 
-@app.get("/categories/")
+@router.get("/categories/")
 def read_categories():
     with Session(engine) as session:
         return session.exec(select(Category)).all()
 
 # --- DASHBOARD ---
-@app.get("/dashboard/inventory_by_category")
-def inventory_by_category():
+@router.get("/dashboard/inventory_by_category")
+def inventory_by_category(store_id: int = DEFAULT_STORE_ID):
+    store_engine = engine_for(store_id)
     with Session(engine) as session:
-        # ดึงหมวดหมู่ทั้งหมด
-        categories = session.exec(select(Category)).all()
-        # ดึงสินค้าทั้งหมด
-        products = session.exec(select(Product)).all()
+        products_by_cat = {}
+        if store_id == DEFAULT_STORE_ID:
+            # ดึงหมวดหมู่พร้อมสินค้าใน query เดียว (join ผ่าน index ix_product_category)
+            rows = session.exec(
+                select(Category, Product)
+                .join(Product, Product.category == Category.name, isouter=True)
+                .order_by(Category.id, Product.id)
+            ).all()
+            for cat, p in rows:
+                cat_products = products_by_cat.setdefault(cat.id, (cat, []))[1]
+                if p is not None:
+                    cat_products.append(p)
+        else:
+            # สินค้าของสาขาอยู่คนละไฟล์กับหมวดหมู่ → join ไม่ได้ ดึงสองฝั่งแล้วจับคู่ตามชื่อ
+            with Session(store_engine) as store_session:
+                products = store_session.exec(select(Product).order_by(Product.id)).all()
+            products_by_name = {}
+            for p in products:
+                products_by_name.setdefault(p.category, []).append(p)
+            for cat in session.exec(select(Category).order_by(Category.id)).all():
+                products_by_cat[cat.id] = (cat, products_by_name.get(cat.name, []))
         # สรุปจำนวนสินค้าคงเหลือแยกตามหมวดหมู่
         result = []
-        for cat in categories:
-            cat_products = [p for p in products if p.category == cat.name]
+        for cat, cat_products in products_by_cat.values():
             total_stock = sum(p.stock for p in cat_products if p.stock is not None)
             result.append({
                 "category_id": cat.id,
@@ -301,7 +467,7 @@ def inventory_by_category():
             })
         return result
 
-@app.post("/categories/")
+@router.post("/categories/")
 def create_category(data: CategoryCreate):
     with Session(engine) as session:
         existing = session.exec(
@@ -315,7 +481,7 @@ def create_category(data: CategoryCreate):
         session.refresh(cat)
         return cat
 
-@app.put("/categories/{category_id}")
+@router.put("/categories/{category_id}")
 def update_category(category_id: int, data: CategoryUpdate):
     with Session(engine) as session:
         db_cat = session.get(Category, category_id)
@@ -326,20 +492,19 @@ def update_category(category_id: int, data: CategoryUpdate):
         for key, value in update_data.items():
             setattr(db_cat, key, value)
         new_name = db_cat.name
-        # ✅ อัปเดตชื่อ category ในสินค้าทุกตัวอัตโนมัติ
-        if old_name != new_name:
-            products_to_update = session.exec(
-                select(Product).where(Product.category == old_name)
-            ).all()
-            for p in products_to_update:
-                p.category = new_name
-                session.add(p)
+        # ✅ อัปเดตชื่อ category ในสินค้าทุกตัวอัตโนมัติ (ทุกสาขา) ก่อน แล้วค่อย commit หมวดหมู่
+        # สาขาใดล้ม → ทุกสาขาได้ชื่อเดิมคืน และหมวดหมู่ไม่ถูกเปลี่ยน
+        renamed = rename_product_category(old_name, new_name) if old_name != new_name else {}
         session.add(db_cat)
-        session.commit()
+        try:
+            session.commit()
+        except Exception:
+            restore_product_category(renamed, old_name)
+            raise
         session.refresh(db_cat)
         return db_cat
 
-@app.delete("/categories/{category_id}")
+@router.delete("/categories/{category_id}")
 def delete_category(category_id: int):
     with Session(engine) as session:
         cat = session.get(Category, category_id)
@@ -351,12 +516,12 @@ def delete_category(category_id: int):
 
 # --- BRANDS ---
 
-@app.get("/brands/")
+@router.get("/brands/")
 def read_brands():
     with Session(engine) as session:
         return session.exec(select(Brand)).all()
 
-@app.post("/brands/")
+@router.post("/brands/")
 def create_brand(data: BrandCreate):
     with Session(engine) as session:
         existing = session.exec(
@@ -370,7 +535,7 @@ def create_brand(data: BrandCreate):
         session.refresh(brand)
         return brand
 
-@app.delete("/brands/{brand_id}")
+@router.delete("/brands/{brand_id}")
 def delete_brand(brand_id: int):
     with Session(engine) as session:
         brand = session.get(Brand, brand_id)
@@ -379,3 +544,25 @@ def delete_brand(brand_id: int):
         session.delete(brand)
         session.commit()
         return {"ok": True, "deleted_id": brand_id}
+
+# --- APP FACTORY ---
+
+def create_app() -> FastAPI:
+    app = FastAPI(lifespan=lifespan)
+    app.add_exception_handler(Exception, global_exception_handler)
+    # จำกัด concurrency ต่อ route + shed ด้วย 503 (เพิ่มก่อน CORS → 503 ยังมี CORS header)
+    if os.getenv("POS_ADMISSION", "1") != "0":
+        app.state.admission = AdmissionController.from_env()
+        app.add_middleware(AdmissionMiddleware, controller=app.state.admission)
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=["*"],
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+    )
+    app.include_router(router)
+    return app
+
+app = create_app()
+STARTUP_TIMINGS["import_ms"] = round((time.perf_counter() - _import_started) * 1000, 1)
@@ -0,0 +1,309 @@
+"""
+Maintenance jobs สำหรับ pos.db และไฟล์ของทุกสาขา (pos_store<N>.db)
+
+แทนสคริปต์ cleanup_garbage.py / cleanup_data.py / normalize_categories.py เดิม
+ที่ DELETE ทีเดียวทั้งก้อน (ล็อกฐานข้อมูลนาน) หรือ INSERT ทีละแถว
+
+- ทุก job มี dry_run=True เพื่อดูตัวอย่างสิ่งที่จะถูกลบ/เพิ่ม โดยไม่แก้ข้อมูล
+- งานเขียนทำเป็น chunk ละ chunk_size แถว แต่ละ chunk เป็น transaction สั้น ๆ
+  แล้วหยุดพัก pause วินาทีให้ request ของร้านแทรกเข้ามาได้ → รันระหว่างเปิดร้านได้
+- progress(job, done, total) ถูกเรียกหลังทุก chunk
+- job ที่ทำกับไฟล์เดียว (garbage / test-data / optimize) รันทุกสาขาด้วย run_per_store
+  ส่วน categories อ่านหมวดหมู่ของสินค้าจากทุกสาขา แต่เพิ่มลงตาราง category ของไฟล์หลักเท่านั้น
+
+ใช้งาน:
+    python maintenance.py garbage --dry-run
+    python maintenance.py test-data
+    python maintenance.py categories
+    python maintenance.py optimize            # ANALYZE + PRAGMA optimize
+    python maintenance.py optimize --vacuum   # + VACUUM (ล็อกทั้งไฟล์ระหว่างทำ)
+    python maintenance.py garbage --stores 1,3   # เฉพาะบางสาขา (ค่าเริ่มต้น: POS_STORES)
+"""
+import argparse
+import os
+import sqlite3
+import time
+
+from defaults import DEFAULT_CATEGORIES
+from stores import DEFAULT_STORE_ID, STORE_IDS, parse_store_ids, store_db_file
+
+DB_PATH = os.getenv("POS_DB_FILE", "pos.db")
+
+DEFAULT_CHUNK_SIZE = 500
+DEFAULT_PAUSE = 0.05       # วินาทีที่พักระหว่าง chunk
+PREVIEW_LIMIT = 20
+
+# ชื่อไทยของหมวดหมู่มาตรฐาน
+DEFAULT_THAI = {c["name"]: c["thai"] for c in DEFAULT_CATEGORIES}
+
+
+def connect(db_path: str = DB_PATH) -> sqlite3.Connection:
+    # isolation_level=None → คุม BEGIN/COMMIT เอง ให้แต่ละ chunk เป็น transaction ของตัวเอง
+    con = sqlite3.connect(db_path, timeout=30, isolation_level=None)
+    con.execute("PRAGMA busy_timeout = 30000")
+    return con
+
+
+def store_files(db_path: str = DB_PATH, store_ids=None) -> dict:
+    """{store_id: ไฟล์ DB} ของสาขาที่มีไฟล์อยู่จริง (สาขาที่ยังไม่เคยใช้ยังไม่มีไฟล์)"""
+    files = {sid: store_db_file(db_path, sid) for sid in store_ids or STORE_IDS}
+    return {sid: path for sid, path in files.items() if os.path.exists(path)}
+
+
+def print_progress(job: str, done: int, total: int):
+    print(f"[{job}] {done}/{total}")
+
+
+def _result(job, dry_run, matched, affected=0, chunks=0, started=None, preview=None):
+    return {
+        "job": job,
+        "dry_run": dry_run,
+        "matched": matched,
+        "affected": affected,
+        "chunks": chunks,
+        "elapsed": round(time.perf_counter() - started, 3) if started else 0.0,
+        "preview": preview or [],
+    }
+
+
+def _placeholders(n: int) -> str:
+    return ",".join("?" * n)
+
+
+def _delete_by_ids(con, table, ids, chunk_size, pause, on_chunk=None):
+    """ลบแถวตาม id ทีละ chunk คืนค่า (จำนวนแถว, จำนวน chunk)"""
+    deleted = chunks = 0
+    for i in range(0, len(ids), chunk_size):
+        chunk = ids[i:i + chunk_size]
+        con.execute("BEGIN IMMEDIATE")
+        try:
+            deleted += con.execute(
+                f"DELETE FROM {table} WHERE id IN ({_placeholders(len(chunk))})", chunk
+            ).rowcount
+            con.execute("COMMIT")
+        except Exception:
+            con.execute("ROLLBACK")
+            raise
+        chunks += 1
+        if on_chunk:
+            on_chunk(deleted)
+        if pause:
+            time.sleep(pause)
+    return deleted, chunks
+
+
+def _select_ids(con, sql, params, chunk_size):
+    """อ่าน id แบบ keyset ทีละ chunk (ไม่ถือ read lock ยาว)"""
+    ids, last_id = [], 0
+    while True:
+        rows = con.execute(f"{sql} AND id > ? ORDER BY id LIMIT ?", (*params, last_id, chunk_size)).fetchall()
+        if not rows:
+            return ids
+        ids.extend(r[0] for r in rows)
+        last_id = rows[-1][0]
+
+
+# --- JOBS ---
+
+def purge_cheap_products(con, max_price: float = 100, dry_run: bool = True,
+                         chunk_size: int = DEFAULT_CHUNK_SIZE, pause: float = DEFAULT_PAUSE,
+                         progress=print_progress):
+    """ลบสินค้าขยะ (price < max_price) พร้อม sale ที่อ้างถึงสินค้าเหล่านั้น"""
+    job = "purge_cheap_products"
+    started = time.perf_counter()
+    preview = con.execute(
+        "SELECT id, name, price FROM product WHERE price < ? ORDER BY id LIMIT ?", (max_price, PREVIEW_LIMIT)
+    ).fetchall()
+    product_ids = _select_ids(con, "SELECT id FROM product WHERE price < ?", (max_price,), chunk_size)
+    if not product_ids:
+        return _result(job, dry_run, 0, started=started)
+
+    sale_ids = []
+    for i in range(0, len(product_ids), chunk_size):
+        chunk = product_ids[i:i + chunk_size]
+        sale_ids.extend(r[0] for r in con.execute(
+            f"SELECT id FROM sale WHERE product_id IN ({_placeholders(len(chunk))})", chunk
+        ))
+    matched = len(product_ids) + len(sale_ids)
+    if dry_run:
+        return _result(job, dry_run, matched, started=started, preview=preview)
+
+    # ลบ sale ก่อน แล้วค่อยลบสินค้า
+    sales_deleted, sale_chunks = _delete_by_ids(
+        con, "sale", sale_ids, chunk_size, pause, lambda n: progress(job, n, matched)
+    )
+    products_deleted, product_chunks = _delete_by_ids(
+        con, "product", product_ids, chunk_size, pause, lambda n: progress(job, sales_deleted + n, matched)
+    )
+    return _result(job, dry_run, matched, sales_deleted + products_deleted,
+                   sale_chunks + product_chunks, started, preview)
+
+
+def delete_test_products(con, dry_run: bool = True,
+                         chunk_size: int = DEFAULT_CHUNK_SIZE, pause: float = DEFAULT_PAUSE,
+                         progress=print_progress):
+    """ลบสินค้าทดสอบ (name ขึ้นต้นด้วย Test หรือ sku ขึ้นต้นด้วย TEST)"""
+    job = "delete_test_products"
+    started = time.perf_counter()
+    sql = "SELECT id FROM product WHERE (name LIKE 'Test%' OR sku LIKE 'TEST%')"
+    preview = con.execute(
+        "SELECT id, name, sku FROM product WHERE name LIKE 'Test%' OR sku LIKE 'TEST%' ORDER BY id LIMIT ?",
+        (PREVIEW_LIMIT,),
+    ).fetchall()
+    ids = _select_ids(con, sql, (), chunk_size)
+    if dry_run or not ids:
+        return _result(job, dry_run, len(ids), started=started, preview=preview)
+
+    deleted, chunks = _delete_by_ids(
+        con, "product", ids, chunk_size, pause, lambda n: progress(job, n, len(ids))
+    )
+    return _result(job, dry_run, len(ids), deleted, chunks, started, preview)
+
+
+# หมวดหมู่ที่สินค้า (ทุกสาขา รวมไว้ใน temp._product_category) ใช้แต่ยังไม่มีในตาราง category
+# (เทียบแบบ case-insensitive เหมือน seed_defaults ใน main.py)
+_MISSING_CATEGORIES = f"""
+    WITH defaults(name, thai) AS (VALUES {",".join("(?, ?)" for _ in DEFAULT_THAI)})
+    SELECT MIN(p.category) AS name, COALESCE(d.thai, '') AS thai
+    FROM temp._product_category p
+    LEFT JOIN defaults d ON d.name = p.category
+    WHERE p.category IS NOT NULL AND p.category <> ''
+      AND NOT EXISTS (SELECT 1 FROM category c WHERE lower(c.name) = lower(p.category))
+    GROUP BY lower(p.category)
+"""
+_DEFAULT_PARAMS = tuple(v for item in DEFAULT_THAI.items() for v in item)
+
+
+def _collect_product_categories(con, shard_files):
+    """หมวดหมู่ของสินค้าในไฟล์หลัก + ทุกไฟล์สาขา → temp._product_category (ATTACH ทีละไฟล์)"""
+    con.execute("CREATE TEMP TABLE IF NOT EXISTS _product_category (category TEXT PRIMARY KEY)")
+    con.execute("DELETE FROM temp._product_category")
+    con.execute("INSERT OR IGNORE INTO temp._product_category SELECT DISTINCT category FROM main.product")
+    for path in shard_files:
+        con.execute("ATTACH DATABASE ? AS shard", (path,))
+        try:
+            con.execute("INSERT OR IGNORE INTO temp._product_category SELECT DISTINCT category FROM shard.product")
+        finally:
+            con.execute("DETACH DATABASE shard")
+
+
+def sync_categories(con, dry_run: bool = True,
+                    chunk_size: int = DEFAULT_CHUNK_SIZE, pause: float = DEFAULT_PAUSE,
+                    progress=print_progress, shard_files=()):
+    """
+    เพิ่มหมวดหมู่ที่สินค้าใช้แต่ยังไม่มีในตาราง category (INSERT ... SELECT ทีละ chunk)
+    con = ไฟล์หลัก (ที่เก็บ category) shard_files = ไฟล์ของสาขาอื่นที่ต้องอ่าน product ด้วย
+    """
+    job = "sync_categories"
+    started = time.perf_counter()
+    _collect_product_categories(con, shard_files)
+    missing = con.execute(_MISSING_CATEGORIES, _DEFAULT_PARAMS).fetchall()
+    if dry_run or not missing:
+        return _result(job, dry_run, len(missing), started=started, preview=missing[:PREVIEW_LIMIT])
+
+    inserted = chunks = 0
+    while True:
+        con.execute("BEGIN IMMEDIATE")
+        try:
+            n = con.execute(
+                f"INSERT INTO category (name, thai) SELECT name, thai FROM ({_MISSING_CATEGORIES}) LIMIT ?",
+                (*_DEFAULT_PARAMS, chunk_size),
+            ).rowcount
+            con.execute("COMMIT")
+        except Exception:
+            con.execute("ROLLBACK")
+            raise
+        if not n:
+            break
+        inserted += n
+        chunks += 1
+        progress(job, inserted, len(missing))
+        if pause:
+            time.sleep(pause)
+    return _result(job, dry_run, len(missing), inserted, chunks, started, missing[:PREVIEW_LIMIT])
+
+
+def optimize(con, vacuum: bool = False, dry_run: bool = True, progress=print_progress):
+    """ANALYZE + PRAGMA optimize (และ VACUUM ถ้าขอ) — VACUUM ล็อกทั้งไฟล์ ควรทำตอนร้านปิด"""
+    job = "optimize"
+    started = time.perf_counter()
+    steps = ["ANALYZE", "PRAGMA optimize"] + (["VACUUM"] if vacuum else [])
+    if dry_run:
+        return _result(job, dry_run, len(steps), started=started, preview=steps)
+    for i, step in enumerate(steps, 1):
+        con.execute(step)
+        progress(job, i, len(steps))
+    return _result(job, dry_run, len(steps), len(steps), len(steps), started, steps)
+
+
+JOBS = {
+    "garbage": purge_cheap_products,
+    "test-data": delete_test_products,
+    "categories": sync_categories,
+    "optimize": optimize,
+}
+
+
+def run_per_store(job, db_path: str = DB_PATH, store_ids=None, **kwargs) -> dict:
+    """รัน job ที่ทำกับไฟล์เดียว (garbage / test-data / optimize) กับทุกสาขา คืนค่า {store_id: result}"""
+    results = {}
+    for store_id, path in store_files(db_path, store_ids).items():
+        con = connect(path)
+        try:
+            results[store_id] = job(con, **kwargs)
+        finally:
+            con.close()
+    return results
+
+
+def sync_all_categories(db_path: str = DB_PATH, store_ids=None, **kwargs) -> dict:
+    """sync_categories จากสินค้าทุกสาขา ลงตาราง category ของไฟล์หลัก"""
+    shards = [path for sid, path in store_files(db_path, store_ids).items() if sid != DEFAULT_STORE_ID]
+    con = connect(db_path)
+    try:
+        return sync_categories(con, shard_files=shards, **kwargs)
+    finally:
+        con.close()
+
+
+def _print_result(result, label=""):
+    mode = "DRY RUN" if result["dry_run"] else "DONE"
+    print(f"{mode} {result['job']}{label}: matched={result['matched']} affected={result['affected']} "
+          f"chunks={result['chunks']} elapsed={result['elapsed']}s")
+    for row in result["preview"]:
+        print(f"- {row}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="POS database maintenance jobs")
+    parser.add_argument("job", choices=sorted(JOBS))
+    parser.add_argument("--db", default=DB_PATH, help="ไฟล์หลัก (ไฟล์สาขาหาจากชื่อนี้)")
+    parser.add_argument("--stores", default=",".join(map(str, STORE_IDS)), help="เช่น 1,2,3")
+    parser.add_argument("--dry-run", action="store_true", help="แสดงตัวอย่าง ไม่แก้ข้อมูล")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument("--pause", type=float, default=DEFAULT_PAUSE)
+    parser.add_argument("--max-price", type=float, default=100, help="ใช้กับ job garbage")
+    parser.add_argument("--vacuum", action="store_true", help="ใช้กับ job optimize")
+    args = parser.parse_args(argv)
+    store_ids = parse_store_ids(args.stores)
+
+    if args.job == "categories":
+        result = sync_all_categories(args.db, store_ids, dry_run=args.dry_run,
+                                     chunk_size=args.chunk_size, pause=args.pause)
+        _print_result(result)
+        return result
+
+    if args.job == "optimize":
+        kwargs = {"vacuum": args.vacuum, "dry_run": args.dry_run}
+    else:
+        kwargs = {"dry_run": args.dry_run, "chunk_size": args.chunk_size, "pause": args.pause}
+        if args.job == "garbage":
+            kwargs["max_price"] = args.max_price
+    results = run_per_store(JOBS[args.job], args.db, store_ids, **kwargs)
+    for store_id, result in results.items():
+        _print_result(result, f" (store {store_id})")
+    return results
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,30 @@
+"""
+Migration: เพิ่มคอลัมน์เงินแบบสตางค์ (price_satang, cost_price_satang, total_price_satang)
+แล้วเติมค่าจากคอลัมน์บาทเดิม — migrate_databases() ใน main.py เพิ่มคอลัมน์ให้ตอน startup อยู่แล้ว
+สคริปต์นี้เติมค่าให้แถวที่ยังว่างทุกคอลัมน์ของทุกสาขา (startup เติมเฉพาะรอบที่เพิ่งเพิ่มคอลัมน์)
+"""
+import os
+import sqlite3
+
+from pricing import migrate_money_columns
+from stores import STORE_IDS, store_db_file
+
+DB_PATH = os.getenv("POS_DB_FILE", "pos.db")
+
+def run(db_path=DB_PATH, store_ids=None):
+    for store_id in store_ids or STORE_IDS:
+        db_file = store_db_file(db_path, store_id)
+        if not os.path.exists(db_file):
+            continue
+        con = sqlite3.connect(db_file)
+        try:
+            added = migrate_money_columns(con, refill_nulls=True)
+        finally:
+            con.close()
+        if added:
+            print(f"✅ store {store_id}: เพิ่มคอลัมน์ {', '.join(added)}")
+        else:
+            print(f"✅ store {store_id}: มีคอลัมน์สตางค์ครบแล้ว (เติมค่าที่ยังว่างให้แล้ว)")
+
+if __name__ == "__main__":
+    run()
@@ -6,27 +6,43 @@ class Product(SQLModel, table=True):
     id: Optional[int] = Field(default=None, primary_key=True)
     name: str
     sku: str
-    category: str
+    category: str = Field(index=True)
     price: float
     cost_price: float  # ราคาต้นทุน
+    price_satang: Optional[int] = None       # ราคาเป็นสตางค์ (ดู pricing.py)
+    cost_price_satang: Optional[int] = None  # ต้นทุนเป็นสตางค์
     stock: int
     has_vat: bool = Field(default=False)
     image: Optional[str] = None
+    store_id: int = Field(default=1)  # สาขา (ดู stores.py)
 
 class Sale(SQLModel, table=True):
+    # AUTOINCREMENT: ไม่ reuse id ของบิลที่ถูกลบ (export แบบ incremental อ้าง id ที่เพิ่มขึ้นเสมอ)
+    __table_args__ = {"sqlite_autoincrement": True}
     id: Optional[int] = Field(default=None, primary_key=True)
-    product_id: int
+    product_id: int = Field(index=True)
     product_name: str
     quantity: int
     total_price: float
+    total_price_satang: Optional[int] = None  # ยอดขายเป็นสตางค์ (ดู pricing.py)
     created_at: datetime = Field(default_factory=datetime.now)
+    store_id: int = Field(default=1)  # สาขา (ดู stores.py)
+
+class SaleVoid(SQLModel, table=True):
+    # tombstone ของ sale ที่ถูกลบ — trigger (main.SALE_VOID_TRIGGER) เขียนให้ทุกทางที่ลบ sale
+    __tablename__ = "sale_void"
+    __table_args__ = {"sqlite_autoincrement": True}
+    id: Optional[int] = Field(default=None, primary_key=True)
+    sale_id: int = Field(index=True)
+    store_id: int = Field(default=1)
+    voided_at: datetime = Field(default_factory=datetime.now)
 
 class Category(SQLModel, table=True):
     id: Optional[int] = Field(default=None, primary_key=True)
-    name: str                      # ชื่อภาษาอังกฤษ
+    name: str = Field(index=True)  # ชื่อภาษาอังกฤษ
     thai: Optional[str] = None     # ชื่อภาษาไทย (ตรงกับ frontend field)
     image: Optional[str] = None    # URL รูปภาพ
 
 class Brand(SQLModel, table=True):
     id: Optional[int] = Field(default=None, primary_key=True)
-    name: str                      # ชื่อแบรนด์
+    name: str = Field(index=True)  # ชื่อแบรนด์
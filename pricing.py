@@ -0,0 +1,133 @@
+"""
+เงินแบบจำนวนเต็ม (สตางค์) และ engine คำนวณราคาตะกร้า (POST /quote)
+
+- เก็บเงินเป็น satang (int) คู่กับคอลัมน์ float เดิม: price_satang, cost_price_satang,
+  total_price_satang → SUM ใน SQL ได้ค่าตรง ไม่มีเศษสตางค์เพี้ยน
+- API ยังรับ/ส่งราคาเป็นบาท (float) เหมือนเดิม satang คำนวณจากค่าบาทตอนบันทึก
+- VAT 7% ของสินค้า has_vat: ราคาขายรวม VAT แล้ว (ราคาป้าย) → VAT = ยอด × 7/107
+  ปัดครั้งเดียวต่อตะกร้า (half-up) ทุก client จึงได้ยอดเดียวกัน
+"""
+import sqlite3
+from decimal import Decimal, ROUND_HALF_UP
+
+from sqlalchemy import select
+
+from models import Product
+
+VAT_RATE_BP = 700           # 7.00% (basis points)
+_BP = 10000
+
+# (table, คอลัมน์ satang, คอลัมน์บาทเดิม)
+MONEY_COLUMNS = [
+    ("product", "price_satang", "price"),
+    ("product", "cost_price_satang", "cost_price"),
+    ("sale", "total_price_satang", "total_price"),
+]
+
+
+def to_satang(baht) -> int:
+    """บาท → สตางค์ (ปัด half-up ผ่าน Decimal(str) เพื่อไม่ให้เศษ float เพี้ยน เช่น 0.1 + 0.2)"""
+    if baht is None:
+        return None
+    return int(Decimal(str(baht)).scaleb(2).quantize(Decimal(1), rounding=ROUND_HALF_UP))
+
+
+def to_baht(satang: int) -> float:
+    return satang / 100
+
+
+def _div_half_up(numerator: int, denominator: int) -> int:
+    return (2 * numerator + denominator) // (2 * denominator)
+
+
+def vat_included(amount_satang: int) -> int:
+    """ส่วนของ VAT ในยอดที่รวม VAT แล้ว"""
+    return _div_half_up(amount_satang * VAT_RATE_BP, _BP + VAT_RATE_BP)
+
+
+def migrate_money_columns(con: sqlite3.Connection, refill_nulls: bool = False) -> list:
+    """
+    เพิ่มคอลัมน์ satang ให้ DB เดิมแล้วเติมค่าจากคอลัมน์บาท คืนค่ารายการคอลัมน์ที่เพิ่ม
+
+    เติมค่าเฉพาะรอบที่เพิ่งเพิ่มคอลัมน์ (ALTER + backfill ใน transaction เดียว) → startup
+    ปกติไม่ต้อง scan ตาราง sale ทุกครั้ง refill_nulls=True เติมแถวที่ยังว่างของทุกคอลัมน์
+    (ใช้ใน migrate_money.py)
+    """
+    cur = con.cursor()
+    tables = {t[0] for t in cur.execute("SELECT name FROM sqlite_master WHERE type='table'")}
+    added = []
+    for table, column, source in MONEY_COLUMNS:
+        if table not in tables:
+            continue
+        cols = [row[1] for row in cur.execute(f"PRAGMA table_info({table})")]
+        if column not in cols:
+            if not con.in_transaction:
+                cur.execute("BEGIN")
+            cur.execute(f"ALTER TABLE {table} ADD COLUMN {column} INTEGER")
+            added.append(f"{table}.{column}")
+        elif not refill_nulls:
+            continue
+        # set-based backfill; ราคาที่มีทศนิยมไม่เกิน 2 ตำแหน่งได้ค่าเดียวกับ to_satang
+        cur.execute(f"UPDATE {table} SET {column} = CAST(ROUND({source} * 100) AS INTEGER) WHERE {column} IS NULL")
+    con.commit()
+    return added
+
+
+def load_prices(conn, product_ids) -> dict:
+    """ดึงราคาสินค้าในตะกร้าทั้งหมดด้วย query เดียว"""
+    rows = conn.execute(
+        select(Product.id, Product.name, Product.price, Product.price_satang,
+               Product.cost_price, Product.cost_price_satang, Product.has_vat)
+        .where(Product.id.in_(set(product_ids)))
+    )
+    return {
+        pid: (name,
+              price_satang if price_satang is not None else to_satang(price),
+              cost_satang if cost_satang is not None else to_satang(cost),
+              bool(has_vat))
+        for pid, name, price, price_satang, cost, cost_satang, has_vat in rows
+    }
+
+
+def quote_basket(items, prices: dict) -> dict:
+    """
+    คำนวณตะกร้าทั้งใบในรอบเดียว: items = [(product_id, quantity)], prices จาก load_prices
+    (ทุก product_id ต้องมีใน prices) คำนวณเป็นสตางค์ทั้งหมด แปลงเป็นบาทตอนส่งออกเท่านั้น
+    """
+    names, unit, cost, vat_flag = zip(*(prices[pid] for pid, _ in items))
+    qty = [q for _, q in items]
+    line_total = [u * q for u, q in zip(unit, qty)]
+    line_cost = [c * q for c, q in zip(cost, qty)]
+
+    subtotal = sum(line_total)
+    vatable = sum(t for t, v in zip(line_total, vat_flag) if v)
+    vat = vat_included(vatable)
+    total_cost = sum(line_cost)
+    margin = subtotal - vat - total_cost
+
+    lines = [
+        {
+            "product_id": pid,
+            "name": name,
+            "quantity": q,
+            "has_vat": v,
+            "unit_price": to_baht(u),
+            "line_total": to_baht(t),
+            "unit_price_satang": u,
+            "line_total_satang": t,
+        }
+        for (pid, _), name, q, v, u, t in zip(items, names, qty, vat_flag, unit, line_total)
+    ]
+    return {
+        "lines": lines,
+        "subtotal": to_baht(subtotal),
+        "vat": to_baht(vat),
+        "total": to_baht(subtotal),
+        "cost": to_baht(total_cost),
+        "margin": to_baht(margin),
+        "subtotal_satang": subtotal,
+        "vat_satang": vat,
+        "total_satang": subtotal,
+        "cost_satang": total_cost,
+        "margin_satang": margin,
+    }
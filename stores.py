@@ -0,0 +1,146 @@
+"""
+Multi-branch (store) sharding
+
+แต่ละสาขามีไฟล์ SQLite ของตัวเอง สาขาจึงไม่แย่ง write lock กัน
+- store 1 (DEFAULT_STORE_ID) ใช้ไฟล์หลัก (pos.db) เหมือนเดิม
+- สาขาอื่นใช้ <ชื่อไฟล์หลัก>_store<id>.db เช่น pos_store2.db
+- กำหนดสาขาด้วย env POS_STORES="1,2,3"
+
+Category / Brand เป็นข้อมูลกลาง อยู่ในไฟล์หลักเท่านั้น
+Product / Sale แยกตามสาขา (store_id)
+
+รายงานข้ามสาขา (fan_out) query ทุก shard พร้อมกันผ่าน thread pool แล้วรวมผล
+"""
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import func, select
+
+from models import Product, Sale
+from pricing import to_baht
+
+DEFAULT_STORE_ID = 1
+
+
+def parse_store_ids(value: str) -> list:
+    ids = [int(s) for s in value.split(",") if s.strip()]
+    if DEFAULT_STORE_ID not in ids:
+        ids.insert(0, DEFAULT_STORE_ID)
+    return ids
+
+
+STORE_IDS = parse_store_ids(os.getenv("POS_STORES", str(DEFAULT_STORE_ID)))
+
+_pool = ThreadPoolExecutor(max_workers=int(os.getenv("POS_STORE_WORKERS", "4")), thread_name_prefix="store")
+
+
+def store_db_file(base_file: str, store_id: int) -> str:
+    if store_id == DEFAULT_STORE_ID:
+        return base_file
+    root, ext = os.path.splitext(base_file)
+    return f"{root}_store{store_id}{ext or '.db'}"
+
+
+class StoreEngines:
+    """cache engine ของแต่ละสาขา (สร้างครั้งแรกที่ถูกเรียกใช้)"""
+
+    def __init__(self, make_engine):
+        self.make_engine = make_engine
+        self._engines = {}
+        self._lock = threading.Lock()
+
+    def get(self, store_id: int):
+        engine = self._engines.get(store_id)
+        if engine is None:
+            with self._lock:
+                engine = self._engines.get(store_id)
+                if engine is None:
+                    engine = self._engines[store_id] = self.make_engine(store_id)
+        return engine
+
+    def dispose(self):
+        with self._lock:
+            for engine in self._engines.values():
+                engine.dispose()
+            self._engines.clear()
+
+
+def fan_out(fn, store_ids) -> dict:
+    """
+    เรียก fn(store_id) ของทุกสาขาพร้อมกัน คืนค่า {store_id: ผลลัพธ์}
+    รอให้ทุกสาขาเสร็จก่อนเสมอ แม้บางสาขาล้ม (raise error แรกตามลำดับ store_ids)
+    → ผู้เรียกชดเชยงานที่ทำไปแล้วได้โดยไม่มีงานค้างวิ่งอยู่
+    """
+    futures = [_pool.submit(fn, store_id) for store_id in store_ids]
+    wait(futures)
+    return {store_id: future.result() for store_id, future in zip(store_ids, futures)}
+
+
+# --- AGGREGATES (หนึ่ง query ต่อ shard) ---
+
+def inventory_summary(engine) -> list:
+    stmt = (
+        select(
+            Product.category,
+            func.count(Product.id),
+            func.coalesce(func.sum(Product.stock), 0),
+            func.coalesce(func.sum(Product.stock * Product.cost_price_satang), 0),
+        )
+        .group_by(Product.category)
+    )
+    with engine.connect() as conn:
+        return [
+            {"category": cat, "product_count": count, "total_stock": stock, "stock_value_satang": value}
+            for cat, count, stock, value in conn.execute(stmt)
+        ]
+
+
+def sales_summary(engine, start: Optional[datetime] = None, end: Optional[datetime] = None) -> dict:
+    stmt = select(
+        func.count(Sale.id),
+        func.coalesce(func.sum(Sale.quantity), 0),
+        func.coalesce(func.sum(Sale.total_price_satang), 0),
+    )
+    if start is not None:
+        stmt = stmt.where(Sale.created_at >= start)
+    if end is not None:
+        stmt = stmt.where(Sale.created_at < end)
+    with engine.connect() as conn:
+        count, quantity, revenue = conn.execute(stmt).one()
+    return {"sale_count": count, "quantity": quantity, "revenue_satang": revenue}
+
+
+def _totals(rows, keys):
+    return {k: sum(r[k] for r in rows) for k in keys}
+
+
+def _with_baht(row: dict) -> dict:
+    """เพิ่มค่าบาท (float) คู่กับทุกคอลัมน์ *_satang สำหรับแสดงผล"""
+    for key in [k for k in row if k.endswith("_satang")]:
+        row[key[:-len("_satang")]] = to_baht(row[key])
+    return row
+
+
+def merge_inventory(per_store: dict) -> dict:
+    keys = ("product_count", "total_stock", "stock_value_satang")
+    stores, by_category = [], {}
+    for store_id, rows in per_store.items():
+        stores.append({"store_id": store_id, **_totals(rows, keys)})
+        for row in rows:
+            merged = by_category.setdefault(row["category"], {"category": row["category"], **dict.fromkeys(keys, 0)})
+            for k in keys:
+                merged[k] += row[k]
+    return {
+        "stores": [_with_baht(s) for s in stores],
+        "categories": [_with_baht(c) for c in sorted(by_category.values(), key=lambda r: r["category"])],
+        "total": _with_baht(_totals(stores, keys)),
+    }
+
+
+def merge_sales(per_store: dict) -> dict:
+    stores = [{"store_id": store_id, **summary} for store_id, summary in per_store.items()]
+    total = _totals(stores, ("sale_count", "quantity", "revenue_satang"))
+    return {"stores": [_with_baht(s) for s in stores], "total": _with_baht(total)}
@@ -0,0 +1,133 @@
+"""
+ทดสอบ admission control: คิวจำกัด, priority, timeout และ 503 + Retry-After
+"""
+import asyncio
+
+import httpx
+import pytest
+
+from admission import AdmissionController, AdmissionMiddleware, Shed
+
+
+def make_controller(total=1, **overrides):
+    classes = {
+        "checkout": {"priority": 0, "max_concurrency": 1, "max_queue": 2, "queue_timeout": 1.0, "retry_after": 1},
+        "default":  {"priority": 1, "max_concurrency": 1, "max_queue": 2, "queue_timeout": 1.0, "retry_after": 2},
+        "heavy":    {"priority": 2, "max_concurrency": 1, "max_queue": 1, "queue_timeout": 1.0, "retry_after": 5},
+    }
+    for name, cfg in overrides.items():
+        classes[name].update(cfg)
+    return AdmissionController(classes, total_concurrency=total)
+
+
+def test_classify_routes():
+    c = AdmissionController()
+    assert c.classify("POST", "/sales/") == "checkout"
+    assert c.classify("GET", "/sales/") == "heavy"
+    assert c.classify("GET", "/dashboard/inventory_by_category") == "heavy"
+    assert c.classify("DELETE", "/sales/3") == "default"
+    assert c.classify("GET", "/health") is None
+
+
+def test_queue_full_is_shed():
+    async def scenario():
+        c = make_controller()
+        await c.acquire("heavy")
+        waiter = asyncio.create_task(c.acquire("heavy"))
+        await asyncio.sleep(0)
+        with pytest.raises(Shed, match="queue full"):
+            await c.acquire("heavy")
+        c.release("heavy")
+        await waiter
+        c.release("heavy")
+        return c.metrics()["classes"]["heavy"]
+
+    heavy = asyncio.run(scenario())
+    assert (heavy["admitted"], heavy["queued"], heavy["shed"], heavy["in_flight"]) == (2, 1, 1, 0)
+
+
+def test_checkout_outranks_dashboard():
+    async def scenario():
+        c = make_controller(total=1)
+        order = []
+
+        async def run(cls_name):
+            await c.acquire(cls_name)
+            order.append(cls_name)
+
+        await c.acquire("default")
+        tasks = [asyncio.create_task(run("heavy")), asyncio.create_task(run("checkout"))]
+        await asyncio.sleep(0)
+        c.release("default")     # ที่ว่าง 1 ที่ → checkout ได้ก่อนแม้มาทีหลัง
+        await asyncio.sleep(0.01)
+        c.release(order[0])
+        await asyncio.gather(*tasks)
+        return order
+
+    assert asyncio.run(scenario()) == ["checkout", "heavy"]
+
+
+def test_queue_timeout_is_shed():
+    async def scenario():
+        c = make_controller(heavy={"queue_timeout": 0.01})
+        await c.acquire("heavy")
+        with pytest.raises(Shed, match="queue timeout"):
+            await c.acquire("heavy")
+        return c.metrics()["classes"]["heavy"]
+
+    heavy = asyncio.run(scenario())
+    assert heavy["timed_out"] == 1 and heavy["waiting"] == 0
+
+
+def test_middleware_sheds_with_retry_after():
+    release = asyncio.Event()
+
+    async def slow_app(scope, receive, send):
+        await release.wait()
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b"ok"})
+
+    async def scenario():
+        app = AdmissionMiddleware(slow_app, make_controller(heavy={"max_queue": 0}))
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://pos") as client:
+            first = asyncio.create_task(client.get("/dashboard/inventory_by_category"))
+            await asyncio.sleep(0.01)
+            shed = await client.get("/dashboard/inventory_by_category")
+            release.set()
+            return (await first), shed
+
+    first, shed = asyncio.run(scenario())
+    assert first.status_code == 200
+    assert shed.status_code == 503
+    assert shed.headers["retry-after"] == "5"
+    assert shed.json()["class"] == "heavy"
+
+
+def test_metrics_endpoint(client):
+    client.get("/categories/")
+    metrics = client.get("/admission/metrics").json()
+    assert metrics["enabled"] is True
+    assert metrics["classes"]["default"]["admitted"] >= 1
+    assert metrics["in_flight"] == 0
+
+
+def test_route_can_get_its_own_limit():
+    c = AdmissionController.from_config({
+        "total_concurrency": 8,
+        "reports": {"max_concurrency": 1, "max_queue": 0},
+        "routes": [["GET", "^/stores/sales$", "reports"], ["GET", "^/brands/$", None]],
+    })
+    assert c.classify("GET", "/stores/sales") == "reports"
+    assert c.classify("GET", "/stores/inventory") == "heavy"
+    assert c.classify("GET", "/brands/") is None
+    assert c.classes["reports"]["priority"] == c.classes["default"]["priority"]
+
+    async def scenario():
+        await c.acquire("reports")
+        with pytest.raises(Shed, match="queue full"):
+            await c.acquire("reports")
+        await c.acquire("heavy")          # class อื่นไม่ถูกจำกัดตาม route นี้
+
+    asyncio.run(scenario())
+    with pytest.raises(ValueError, match="unknown admission class"):
+        AdmissionController.from_config({"routes": [["GET", "^/x$", "nope"]]})
@@ -0,0 +1,38 @@
+"""
+Cold-start budget: import main + startup + request แรก ใน process ใหม่ ใช้เวลาเกิน baseline
+(process ที่รัน FastAPI app เปล่า) ไม่เกิน COLD_START_BUDGET_MS
+
+test จับเวลาจริงรันเฉพาะเมื่อ POS_RUN_BENCH=1 (เครื่อง CI ที่โหลดหนักทำให้ fail แบบสุ่ม)
+ตัวบังคับ budget หลักคือ exit code ของ python bench_cold_start.py
+"""
+import os
+
+import pytest
+from sqlmodel import Session, select
+
+import main
+from bench_cold_start import COLD_START_BUDGET_MS, measure_baseline, measure_cold_start, seed_db
+from models import Category
+
+
+@pytest.mark.skipif(os.getenv("POS_RUN_BENCH") != "1", reason="wall-clock benchmark: set POS_RUN_BENCH=1")
+def test_cold_start_within_budget(tmp_path):
+    db_file = str(tmp_path / "pos.db")
+    seed_db(db_file)
+    measure_cold_start(db_file)  # รอบแรกมี migration
+    result = measure_cold_start(db_file)
+    baseline = measure_baseline()
+
+    assert result["status"] == 200 and baseline["status"] == 200
+    assert result["total_ms"] - baseline["total_ms"] <= COLD_START_BUDGET_MS, (result, baseline)
+    assert result["app_timings"]["import_ms"] > 0
+    assert result["app_timings"]["startup_ms"] > 0
+
+
+def test_seeding_runs_in_background(client):
+    main.app.state.seeder.join()
+    health = client.get("/health").json()
+    assert health["seeded"] is True and health["seed_ms"] is not None
+    with Session(main.engine) as session:
+        names = {c.name for c in session.exec(select(Category)).all()}
+    assert {c["name"] for c in main.DEFAULT_CATEGORIES} <= names
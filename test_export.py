@@ -0,0 +1,106 @@
+"""
+ทดสอบ export เป็น Parquet / Arrow (ข้ามถ้าไม่มี pyarrow)
+"""
+import json
+import os
+
+import pytest
+from sqlmodel import Session, create_engine
+
+from models import Brand, Category, Product, Sale
+
+pa = pytest.importorskip("pyarrow")
+import pyarrow.ipc  # noqa: E402
+import pyarrow.parquet as pq  # noqa: E402
+
+import export  # noqa: E402
+import fast_path  # noqa: E402
+import main  # noqa: E402
+
+
+@pytest.fixture
+def db_file(tmp_path):
+    path = str(tmp_path / "pos.db")
+    engine = create_engine(f"sqlite:///{path}")
+    main.create_db_and_tables(engine)   # ตาราง + trigger tombstone ของ sale
+    with Session(engine) as session:
+        session.add(Category(name="Tv", thai="โทรทัศน์"))
+        session.add(Brand(name="LG"))
+        session.add(Product(name="TV", sku="S", category="Tv", price=7500.0, cost_price=7000.0,
+                            price_satang=750000, cost_price_satang=700000, stock=3, has_vat=True))
+        for i in range(7):
+            session.add(Sale(product_id=1, product_name="TV", quantity=1, total_price=7500.0, total_price_satang=750000))
+        session.commit()
+    engine.dispose()
+    return path
+
+
+def add_sales(db_file, n):
+    engine = create_engine(f"sqlite:///{db_file}")
+    with Session(engine) as session:
+        for _ in range(n):
+            session.add(Sale(product_id=1, product_name="TV", quantity=2, total_price=15000.0))
+        session.commit()
+    engine.dispose()
+
+
+def test_parquet_export_is_incremental(db_file, tmp_path):
+    out = str(tmp_path / "out")
+    first = export.run_export(out, db_path=db_file, batch_size=3, store_ids=[1])
+    assert first["sale"]["store_1"]["rows"] == 7
+    assert first["product"]["store_1"]["rows"] == 1
+
+    table = pq.read_table(first["sale"]["store_1"]["path"])
+    assert table.num_rows == 7
+    assert table.schema.field("created_at").type == pa.timestamp("us")
+    assert table.column("total_price_satang").to_pylist()[0] == 750000
+    product = pq.read_table(first["product"]["store_1"]["path"])
+    assert product.column("has_vat").to_pylist() == [True]
+
+    # รอบสอง: เขียนเฉพาะ sale ใหม่ เป็น part file ใหม่
+    add_sales(db_file, 2)
+    second = export.run_export(out, tables=["sale"], db_path=db_file, store_ids=[1])
+    assert second["sale"]["store_1"]["rows"] == 2
+    assert os.path.basename(second["sale"]["store_1"]["path"]) == "part-0000000008.parquet"
+    assert pq.read_table(os.path.join(out, "sale")).num_rows == 9
+
+    with open(os.path.join(out, export.STATE_FILE)) as f:
+        assert json.load(f)["sale"] == {"store_1": 9}
+
+    # ไม่มีแถวใหม่ → ไม่สร้างไฟล์
+    assert export.run_export(out, tables=["sale"], db_path=db_file, store_ids=[1])["sale"]["store_1"]["path"] is None
+
+
+def test_arrow_full_export(db_file, tmp_path):
+    out = str(tmp_path / "out")
+    export.run_export(out, tables=["sale"], db_path=db_file, store_ids=[1])
+    result = export.run_export(out, tables=["sale", "brand"], fmt="arrow", full=True, db_path=db_file, store_ids=[1])
+    assert result["sale"]["store_1"]["rows"] == 7
+    assert pa.ipc.open_file(result["brand"]["brand"]["path"]).read_all().column("name").to_pylist() == ["LG"]
+    assert not any(f.endswith(".parquet") for f in os.listdir(os.path.join(out, "sale", "store_1")))
+
+
+def test_void_last_sale_then_sell_again(db_file, tmp_path):
+    out = str(tmp_path / "out")
+    export.run_export(out, tables=["sale", "sale_void"], db_path=db_file, store_ids=[1])
+
+    engine = create_engine(f"sqlite:///{db_file}")
+    fast_path.delete_sale(engine, 7)                       # ยกเลิกบิลล่าสุด
+    sold = fast_path.create_sale(engine, Sale(product_id=1, product_name="TV", quantity=1, total_price=7500.0))
+    engine.dispose()
+    assert sold["id"] == 8                                 # id 7 ไม่ถูก reuse
+
+    result = export.run_export(out, tables=["sale", "sale_void"], db_path=db_file, store_ids=[1])
+    assert result["sale"]["store_1"]["rows"] == 1
+    assert pq.read_table(result["sale"]["store_1"]["path"]).column("id").to_pylist() == [8]
+    assert pq.read_table(result["sale_void"]["store_1"]["path"]).column("sale_id").to_pylist() == [7]
+
+
+def test_db_path_with_uri_characters(db_file, tmp_path):
+    odd_dir = tmp_path / "pos?v=1#x%20"
+    odd_dir.mkdir()
+    odd_file = str(odd_dir / "pos.db")
+    os.replace(db_file, odd_file)
+
+    result = export.run_export(str(tmp_path / "out"), tables=["sale"], db_path=odd_file, store_ids=[1])
+    assert result["sale"]["store_1"]["rows"] == 7
@@ -0,0 +1,55 @@
+"""
+ทดสอบ hot path (fast_path.py): ผลลัพธ์ต้องหน้าตาเหมือนที่ ORM คืน และ error เดิมทุกกรณี
+"""
+from models import Product, Sale
+
+PRODUCT = {"name": "Fan", "sku": "FAN1", "category": "Fan", "price": 990.0, "cost_price": 700.0,
+           "stock": 5, "has_vat": True}
+
+
+def test_sale_matches_orm_shape(client):
+    product = client.post("/products/", json=PRODUCT).json()
+    sale = {"product_id": product["id"], "product_name": "Fan", "quantity": 2, "total_price": 1980.0}
+
+    created = client.post("/sales/", json=sale).json()
+    assert set(created) == set(Sale.model_fields)
+    assert created["total_price_satang"] == 198000 and created["store_id"] == 1
+    assert client.get("/sales/").json() == [created]  # ORM อ่านกลับได้ค่าเดียวกันทุกช่อง
+    assert client.get("/products/").json()[0]["stock"] == 3
+
+    assert client.post("/sales/", json={**sale, "quantity": 4}).json() == {"detail": "Not enough stock"}
+    assert client.post("/sales/", json={**sale, "product_id": 99}).json() == {"detail": "Product not found"}
+
+
+def test_update_product_matches_orm_shape(client):
+    product = client.post("/products/", json=PRODUCT).json()
+
+    updated = client.put(f"/products/{product['id']}", json={**PRODUCT, "price": 19.99, "id": 42}).json()
+    assert set(updated) == set(Product.model_fields)
+    assert updated == client.get("/products/").json()[0]
+    assert (updated["id"], updated["price_satang"], updated["has_vat"]) == (product["id"], 1999, True)
+
+    assert client.put("/products/99", json=PRODUCT).json() == {"detail": "Product not found"}
+
+
+def test_delete_sale_restores_stock(client):
+    product = client.post("/products/", json=PRODUCT).json()
+    sale = client.post("/sales/", json={"product_id": product["id"], "product_name": "Fan",
+                                        "quantity": 5, "total_price": 4950.0}).json()
+
+    assert client.delete(f"/sales/{sale['id']}").json() == {"ok": True}
+    assert client.get("/products/").json()[0]["stock"] == 5
+    assert client.delete(f"/sales/{sale['id']}").status_code == 404
+
+
+def test_whole_number_floats_keep_orm_types(client):
+    product = client.post("/products/", json={**PRODUCT, "price": 100, "cost_price": 80}).json()
+
+    updated = client.put(f"/products/{product['id']}", json={"stock": 2}).json()   # PUT บางช่อง
+    assert updated == client.get("/products/").json()[0]
+    assert (type(updated["price"]), type(updated["cost_price"])) == (float, float)
+
+    sale = {"product_id": product["id"], "product_name": "Fan", "quantity": 1, "total_price": 100}
+    created = client.post("/sales/", json=sale).json()
+    assert created == client.get("/sales/").json()[0]
+    assert type(created["total_price"]) is float
@@ -0,0 +1,122 @@
+"""
+ทดสอบ maintenance jobs กับฐานข้อมูลชั่วคราว
+"""
+import sqlite3
+
+import pytest
+
+import maintenance
+import migrate_money
+from stores import store_db_file
+
+
+@pytest.fixture
+def con(tmp_path):
+    con = maintenance.connect(str(tmp_path / "maint.db"))
+    con.executescript("""
+        CREATE TABLE product (id INTEGER PRIMARY KEY, name TEXT, sku TEXT, category TEXT,
+                              price FLOAT, cost_price FLOAT, stock INTEGER, image TEXT, has_vat BOOLEAN DEFAULT 0);
+        CREATE TABLE sale (id INTEGER PRIMARY KEY, product_id INTEGER, product_name TEXT,
+                           quantity INTEGER, total_price FLOAT, created_at DATETIME);
+        CREATE TABLE category (id INTEGER PRIMARY KEY, name TEXT NOT NULL, thai TEXT, image TEXT);
+    """)
+    for i in range(1, 11):
+        price = 1.0 if i <= 5 else 7500.0
+        con.execute("INSERT INTO product VALUES (?, ?, ?, ?, ?, ?, 1, NULL, 0)",
+                    (i, f"P{i}", f"SKU{i}", "Tv" if i % 2 else "Fan", price, price))
+        con.execute("INSERT INTO sale (product_id, product_name, quantity, total_price, created_at) "
+                    "VALUES (?, ?, 1, ?, '2024-01-01')", (i, f"P{i}", price))
+    con.execute("INSERT INTO product VALUES (11, 'Test item', 'TEST1', 'tv', 500, 500, 1, NULL, 0)")
+    con.execute("INSERT INTO category (name, thai) VALUES ('TV', 'ทีวี')")
+    yield con
+    con.close()
+
+
+def count(con, table):
+    return con.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+
+
+def test_purge_dry_run_does_not_write(con):
+    result = maintenance.purge_cheap_products(con, dry_run=True)
+    assert result["matched"] == 10  # 5 products + 5 sales
+    assert [row[0] for row in result["preview"]] == [1, 2, 3, 4, 5]
+    assert count(con, "product") == 11
+    assert count(con, "sale") == 10
+
+
+def test_purge_runs_in_chunks_with_progress(con):
+    calls = []
+    result = maintenance.purge_cheap_products(
+        con, dry_run=False, chunk_size=2, pause=0, progress=lambda *a: calls.append(a)
+    )
+    assert result["affected"] == 10
+    assert result["chunks"] == 6  # 3 chunks ของ sale + 3 chunks ของ product
+    assert calls[-1] == ("purge_cheap_products", 10, 10)
+    assert count(con, "product") == 6
+    assert count(con, "sale") == 5
+    assert not con.in_transaction
+
+
+def test_delete_test_products(con):
+    assert maintenance.delete_test_products(con, dry_run=True)["matched"] == 1
+    result = maintenance.delete_test_products(con, dry_run=False, pause=0, progress=lambda *a: None)
+    assert result["affected"] == 1
+    assert con.execute("SELECT COUNT(*) FROM product WHERE sku = 'TEST1'").fetchone()[0] == 0
+
+
+def test_sync_categories_is_case_insensitive(con):
+    preview = maintenance.sync_categories(con, dry_run=True)
+    assert preview["preview"] == [("Fan", "พัดลม")]  # 'Tv'/'tv' ตรงกับ 'TV' ที่มีอยู่แล้ว
+
+    result = maintenance.sync_categories(con, dry_run=False, pause=0, progress=lambda *a: None)
+    assert result["affected"] == 1
+    assert maintenance.sync_categories(con, dry_run=True)["matched"] == 0
+
+
+def test_optimize(con):
+    assert maintenance.optimize(con, vacuum=True, dry_run=True)["preview"] == ["ANALYZE", "PRAGMA optimize", "VACUUM"]
+    result = maintenance.optimize(con, vacuum=True, dry_run=False, progress=lambda *a: None)
+    assert result["affected"] == 3
+
+
+def test_jobs_cover_every_store(con, tmp_path):
+    main_file = str(tmp_path / "maint.db")
+    branch = maintenance.connect(store_db_file(main_file, 2))
+    branch.executescript("""
+        CREATE TABLE product (id INTEGER PRIMARY KEY, name TEXT, sku TEXT, category TEXT,
+                              price FLOAT, cost_price FLOAT, stock INTEGER, image TEXT, has_vat BOOLEAN DEFAULT 0);
+        CREATE TABLE sale (id INTEGER PRIMARY KEY, product_id INTEGER, product_name TEXT,
+                           quantity INTEGER, total_price FLOAT, created_at DATETIME);
+        INSERT INTO product VALUES (1, 'Drone', 'D1', 'Drone', 9900, 9000, 1, NULL, 0);
+        INSERT INTO product VALUES (2, 'Cable', 'C1', 'Drone', 5, 1, 1, NULL, 0);
+        INSERT INTO sale VALUES (1, 2, 'Cable', 1, 5, '2024-01-01');
+    """)
+    branch.close()
+    quiet = {"pause": 0, "progress": lambda *a: None}
+
+    results = maintenance.run_per_store(maintenance.purge_cheap_products, main_file, [1, 2, 3],
+                                        dry_run=False, **quiet)
+    assert {sid: r["affected"] for sid, r in results.items()} == {1: 10, 2: 2}   # store 3 ไม่มีไฟล์
+
+    result = maintenance.sync_all_categories(main_file, [1, 2], dry_run=False, **quiet)
+    assert [name for name, _ in result["preview"]] == ["Drone", "Fan"]
+    assert con.execute("SELECT COUNT(*) FROM category WHERE name = 'Drone'").fetchone()[0] == 1
+    branch = maintenance.connect(store_db_file(main_file, 2))
+    assert branch.execute("SELECT name FROM sqlite_master WHERE name = 'category'").fetchone() is None
+    branch.close()
+
+
+def test_migrate_money_refills_every_store(tmp_path):
+    main_file = str(tmp_path / "pos.db")
+    for sid in (1, 2):
+        c = sqlite3.connect(store_db_file(main_file, sid))
+        c.execute("CREATE TABLE sale (id INTEGER PRIMARY KEY, total_price FLOAT, total_price_satang INTEGER)")
+        c.execute("INSERT INTO sale VALUES (1, 0.3, NULL)")
+        c.commit()
+        c.close()
+
+    migrate_money.run(main_file, [1, 2])
+    for sid in (1, 2):
+        c = sqlite3.connect(store_db_file(main_file, sid))
+        assert c.execute("SELECT total_price_satang FROM sale").fetchone() == (30,)
+        c.close()
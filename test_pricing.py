@@ -0,0 +1,88 @@
+"""
+ทดสอบเงินแบบสตางค์, migration และ POST /quote
+"""
+import sqlite3
+
+from pricing import migrate_money_columns, to_satang, vat_included
+
+
+def add_product(client, price, cost_price, has_vat):
+    product = {"name": "P", "sku": "S", "category": "Tv", "price": price,
+               "cost_price": cost_price, "stock": 10, "has_vat": has_vat}
+    return client.post("/products/", json=product).json()
+
+
+def test_to_satang_is_exact():
+    assert to_satang(0.1 + 0.2) == 30
+    assert to_satang(19.99) == 1999
+    assert to_satang(0.005) == 1
+    assert sum(to_satang(0.1) for _ in range(1000)) == 10000
+
+
+def test_vat_included_rounds_half_up():
+    assert vat_included(10700) == 700
+    assert vat_included(100) == 7       # 6.54 → 7
+    assert vat_included(0) == 0
+
+
+def test_products_store_satang(client):
+    p = add_product(client, 7499.99, 7100.5, False)
+    assert (p["price_satang"], p["cost_price_satang"]) == (749999, 710050)
+    p = client.put(f"/products/{p['id']}", json={**p, "price": 19.9}).json()
+    assert p["price_satang"] == 1990
+
+
+def test_quote_basket(client):
+    tv = add_product(client, 10700.0, 8000.0, True)
+    fan = add_product(client, 990.5, 700.25, False)
+    body = {"items": [{"product_id": tv["id"], "quantity": 2}, {"product_id": fan["id"], "quantity": 3}]}
+    q = client.post("/quote", json=body).json()
+
+    assert q["subtotal_satang"] == 2 * 1070000 + 3 * 99050
+    assert q["vat_satang"] == 2 * 70000
+    assert q["cost_satang"] == 2 * 800000 + 3 * 70025
+    assert q["margin_satang"] == q["subtotal_satang"] - q["vat_satang"] - q["cost_satang"]
+    assert q["total"] == 24371.5
+    assert [line["line_total_satang"] for line in q["lines"]] == [2140000, 297150]
+
+
+def test_quote_errors(client):
+    assert client.post("/quote", json={"items": [{"product_id": 99, "quantity": 1}]}).status_code == 404
+    assert client.post("/quote", json={"items": []}).status_code == 422
+    assert client.post("/quote", json={"items": [{"product_id": 1, "quantity": 0}]}).status_code == 422
+
+
+def test_sale_total_is_stored_in_satang(client):
+    p = add_product(client, 0.1, 0.05, False)
+    for _ in range(3):
+        client.post("/sales/", json={"product_id": p["id"], "product_name": "P", "quantity": 1, "total_price": 0.1})
+    assert client.get("/stores/sales").json()["total"]["revenue_satang"] == 30
+
+
+def test_migrate_money_columns_backfills(tmp_path):
+    con = sqlite3.connect(str(tmp_path / "old.db"))
+    con.execute("CREATE TABLE product (id INTEGER PRIMARY KEY, price FLOAT, cost_price FLOAT)")
+    con.execute("CREATE TABLE sale (id INTEGER PRIMARY KEY, total_price FLOAT)")
+    con.execute("INSERT INTO product VALUES (1, 7500.0, 7199.99)")
+    con.execute("INSERT INTO sale VALUES (1, 0.3)")
+    assert migrate_money_columns(con) == ["product.price_satang", "product.cost_price_satang", "sale.total_price_satang"]
+    assert con.execute("SELECT price_satang, cost_price_satang FROM product").fetchone() == (750000, 719999)
+    assert con.execute("SELECT total_price_satang FROM sale").fetchone() == (30,)
+    assert migrate_money_columns(con) == []
+
+
+def test_startup_migration_does_not_rescan(tmp_path):
+    con = sqlite3.connect(str(tmp_path / "old.db"))
+    con.execute("CREATE TABLE sale (id INTEGER PRIMARY KEY, total_price FLOAT)")
+    migrate_money_columns(con)
+    con.execute("INSERT INTO sale (id, total_price) VALUES (1, 0.3)")
+    con.commit()
+
+    statements = []
+    con.set_trace_callback(statements.append)
+    assert migrate_money_columns(con) == []
+    assert not any(s.startswith("UPDATE") for s in statements)
+    assert con.execute("SELECT total_price_satang FROM sale").fetchone() == (None,)
+
+    migrate_money_columns(con, refill_nulls=True)   # migrate_money.py
+    assert con.execute("SELECT total_price_satang FROM sale").fetchone() == (30,)
@@ -0,0 +1,178 @@
+"""
+Query-count และ query-plan regression tests สำหรับทุก route ใน main.py
+
+แต่ละ route รันกับฐานข้อมูลชั่วคราวที่ seed ไว้แล้ว แล้วนับ SQL ที่ยิงจริง
+(executemany นับทีละแถว) จากนั้น EXPLAIN QUERY PLAN ทุก statement:
+- เกิน budget → fail (กัน N+1 กลับมา)
+- มี "SCAN <table>" ที่ route นั้นไม่ได้อนุญาต → fail (กัน full table scan)
+
+เพิ่ม route ใหม่ใน main.py ต้องเพิ่ม budget ใน ROUTE_BUDGETS ด้วย ไม่งั้น test_every_route_has_a_budget fail
+"""
+import pytest
+from fastapi.routing import APIRoute
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+from sqlmodel import Session, update
+
+import main
+from models import Brand, Category, Product, Sale
+
+PRODUCTS_PER_CATEGORY = 25
+
+# (method, path) → (จำนวน statement สูงสุด, ตารางที่ยอม SCAN ได้)
+ROUTE_BUDGETS = {
+    ("GET", "/"): (0, set()),
+    ("GET", "/health"): (0, set()),
+    ("GET", "/admission/metrics"): (0, set()),
+    ("GET", "/products/"): (1, {"product"}),
+    ("POST", "/products/"): (2, set()),
+    ("PUT", "/products/{product_id}"): (1, set()),
+    ("DELETE", "/products/{product_id}"): (2, set()),
+    ("GET", "/sales/"): (1, {"sale"}),
+    ("POST", "/sales/"): (2, set()),
+    ("DELETE", "/sales/{sale_id}"): (2, set()),
+    ("GET", "/categories/"): (1, {"category"}),
+    ("POST", "/categories/"): (3, set()),
+    ("PUT", "/categories/{category_id}"): (4, set()),
+    ("DELETE", "/categories/{category_id}"): (2, set()),
+    ("GET", "/dashboard/inventory_by_category"): (1, {"category"}),
+    ("GET", "/brands/"): (1, {"brand"}),
+    ("POST", "/brands/"): (3, set()),
+    ("DELETE", "/brands/{brand_id}"): (2, set()),
+    # รายงานข้ามสาขา: หนึ่ง aggregate query ต่อ shard (test นี้มี shard เดียว)
+    ("GET", "/stores/inventory"): (1, {"product"}),
+    ("GET", "/stores/sales"): (1, {"sale"}),
+    ("POST", "/quote"): (1, set()),
+}
+
+# startup ต้องไม่ขึ้นกับจำนวนสินค้า (เดิม rename หมวดหมู่ทีละสินค้า)
+STARTUP_BUDGET = 36
+
+PRODUCT = {"name": "Fan X", "sku": "FX1", "category": "Fan", "price": 990.0, "cost_price": 700.0, "stock": 5}
+
+# request ตัวอย่างของแต่ละ route (id อ้างถึงข้อมูลที่ seed)
+ROUTE_CALLS = {
+    ("GET", "/"): ("/", None),
+    ("GET", "/health"): ("/health", None),
+    ("GET", "/admission/metrics"): ("/admission/metrics", None),
+    ("GET", "/products/"): ("/products/", None),
+    ("POST", "/products/"): ("/products/", PRODUCT),
+    ("PUT", "/products/{product_id}"): ("/products/1", {**PRODUCT, "stock": 9}),
+    ("DELETE", "/products/{product_id}"): ("/products/2", None),
+    ("GET", "/sales/"): ("/sales/", None),
+    ("POST", "/sales/"): ("/sales/", {"product_id": 3, "product_name": "P3", "quantity": 1, "total_price": 100.0}),
+    ("DELETE", "/sales/{sale_id}"): ("/sales/1", None),
+    ("GET", "/categories/"): ("/categories/", None),
+    ("POST", "/categories/"): ("/categories/", {"name": "Air Conditioner", "thai": "แอร์"}),
+    ("PUT", "/categories/{category_id}"): ("/categories/1", {"name": "Television"}),
+    ("DELETE", "/categories/{category_id}"): ("/categories/2", None),
+    ("GET", "/dashboard/inventory_by_category"): ("/dashboard/inventory_by_category", None),
+    ("GET", "/brands/"): ("/brands/", None),
+    ("POST", "/brands/"): ("/brands/", {"name": "Toshiba"}),
+    ("DELETE", "/brands/{brand_id}"): ("/brands/1", None),
+    ("GET", "/stores/inventory"): ("/stores/inventory", None),
+    ("GET", "/stores/sales"): ("/stores/sales", None),
+    ("POST", "/quote"): ("/quote", {"items": [{"product_id": 1, "quantity": 2}, {"product_id": 4, "quantity": 1}]}),
+}
+
+
+class QueryRecorder:
+    """เก็บ SQL ที่ engine ยิงระหว่าง with-block"""
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.statements = []
+
+    def _record(self, conn, cursor, statement, parameters, context, executemany):
+        rows = parameters if executemany else [parameters]
+        for params in rows:
+            self.statements.append((statement, params))
+
+    def __enter__(self):
+        event.listen(self.engine, "before_cursor_execute", self._record)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(self.engine, "before_cursor_execute", self._record)
+
+    def scanned_tables(self):
+        tables = set()
+        with self.engine.connect() as conn:
+            for statement, params in self.statements:
+                if not statement.lstrip().upper().startswith(("SELECT", "UPDATE", "DELETE")):
+                    continue
+                plan = conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", params or ()).fetchall()
+                for row in plan:
+                    detail = row[-1]
+                    if detail.startswith("SCAN ") and "CONSTANT ROW" not in detail:
+                        tables.add(detail.split()[1])
+        return tables
+
+
+def seed(engine):
+    with Session(engine) as session:
+        session.add(Category(id=1, name="Tv", thai="โทรทัศน์"))
+        session.add(Category(id=2, name="Fan", thai="พัดลม"))
+        session.add(Brand(id=1, name="Samsung"))
+        for i in range(1, 2 * PRODUCTS_PER_CATEGORY + 1):
+            session.add(Product(id=i, name=f"P{i}", sku=f"SKU{i}", category="Tv" if i % 2 else "Fan",
+                                price=100.0, cost_price=80.0, stock=10))
+            session.add(Sale(product_id=i, product_name=f"P{i}", quantity=1, total_price=100.0))
+        session.commit()
+
+
+@pytest.fixture
+def engine(tmp_path, pos_db):
+    pos_db(str(tmp_path / "budget.db"))
+    main.create_db_and_tables()
+    seed(main.engine)
+    return main.engine
+
+
+@pytest.fixture
+def client(engine):
+    with TestClient(main.app) as client:
+        main.app.state.seeder.join()  # ไม่ให้ seed เบื้องหลังปนกับ query ของ route
+        yield client
+
+
+def test_every_route_has_a_budget():
+    routes = {
+        (method, route.path)
+        for route in main.app.routes if isinstance(route, APIRoute)
+        for method in route.methods
+    }
+    assert routes - set(ROUTE_BUDGETS) == set(), "route ใหม่ต้องมี budget ใน ROUTE_BUDGETS"
+    assert set(ROUTE_BUDGETS) == set(ROUTE_CALLS)
+
+
+@pytest.mark.parametrize("route", sorted(ROUTE_BUDGETS), ids=lambda r: f"{r[0]} {r[1]}")
+def test_route_query_budget_and_plan(engine, client, route):
+    method, _ = route
+    budget, allowed_scans = ROUTE_BUDGETS[route]
+    path, body = ROUTE_CALLS[route]
+
+    with QueryRecorder(engine) as recorder:
+        response = client.request(method, path, json=body)
+    assert response.status_code == 200, response.text
+
+    statements = [s for s, _ in recorder.statements]
+    assert len(statements) <= budget, f"{method} {path}: {len(statements)} queries > {budget}\n" + "\n".join(statements)
+    unexpected = recorder.scanned_tables() - allowed_scans
+    assert not unexpected, f"{method} {path}: full table scan on {sorted(unexpected)}"
+
+
+def test_startup_query_budget(engine):
+    # หมวดหมู่ชื่อเพี้ยน ('tv') ทำให้ startup ต้อง rename ในสินค้าทุกตัว
+    with Session(engine) as session:
+        session.get(Category, 1).name = "tv"
+        session.exec(update(Product).where(Product.category == "Tv").values(category="tv"))
+        session.commit()
+
+    with QueryRecorder(engine) as recorder:
+        with TestClient(main.app):
+            pass
+
+    assert len(recorder.statements) <= STARTUP_BUDGET, "\n".join(s for s, _ in recorder.statements)
+    with Session(engine) as session:
+        assert session.get(Product, 1).category == "Tv"
@@ -0,0 +1,162 @@
+"""
+ทดสอบการแยกสาขา (store sharding) และรายงานรวมทุกสาขา
+"""
+import os
+import sqlite3
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.exc import IntegrityError
+
+import main
+from stores import parse_store_ids, store_db_file
+
+
+@pytest.fixture
+def client(pos_db):
+    pos_db(store_ids=[1, 2])
+    with TestClient(main.app) as client:
+        yield client
+
+
+def add_product(client, store_id, category, stock, cost_price=100.0):
+    product = {"name": f"P{store_id}", "sku": "SKU", "category": category, "price": 200.0,
+               "cost_price": cost_price, "stock": stock, "store_id": store_id}
+    return client.post("/products/", json=product).json()
+
+
+def sell(client, product, quantity):
+    sale = {"product_id": product["id"], "product_name": product["name"], "quantity": quantity,
+            "total_price": 200.0 * quantity, "store_id": product["store_id"]}
+    return client.post("/sales/", json=sale)
+
+
+def test_store_ids_always_include_default():
+    assert parse_store_ids("2,3") == [1, 2, 3]
+    assert store_db_file("data/pos.db", 1) == "data/pos.db"
+    assert store_db_file("data/pos.db", 3) == "data/pos_store3.db"
+
+
+def test_products_and_sales_are_routed_per_store(client):
+    tv1 = add_product(client, 1, "Tv", stock=10)
+    tv2 = add_product(client, 2, "Tv", stock=4)
+    assert os.path.exists(store_db_file(main.sqlite_file_name, 2))
+
+    assert sell(client, tv2, 3).status_code == 200
+    assert sell(client, tv2, 3).json() == {"detail": "Not enough stock"}
+
+    assert [p["name"] for p in client.get("/products/", params={"store_id": 2}).json()] == ["P2"]
+    assert client.get("/products/").json()[0]["stock"] == 10
+    assert len(client.get("/sales/", params={"store_id": 1}).json()) == 0
+    assert len(client.get("/sales/", params={"store_id": 2}).json()) == 1
+
+    r = client.put(f"/products/{tv1['id']}", params={"store_id": 1}, json={**tv1, "stock": 7, "store_id": 2})
+    assert r.json()["stock"] == 7 and r.json()["store_id"] == 1
+
+
+def test_unknown_store_is_404(client):
+    assert client.get("/products/", params={"store_id": 9}).status_code == 404
+
+
+def test_cross_store_aggregates(client):
+    add_product(client, 1, "Tv", stock=10, cost_price=100.0)
+    add_product(client, 1, "Fan", stock=5, cost_price=10.0)
+    fan2 = add_product(client, 2, "Fan", stock=4, cost_price=10.0)
+    sell(client, fan2, 2)
+
+    inventory = client.get("/stores/inventory").json()
+    assert inventory["total"] == {"product_count": 3, "total_stock": 17,
+                                  "stock_value_satang": 107000, "stock_value": 1070.0}
+    assert [s["store_id"] for s in inventory["stores"]] == [1, 2]
+    fan = next(c for c in inventory["categories"] if c["category"] == "Fan")
+    assert fan == {"category": "Fan", "product_count": 2, "total_stock": 7,
+                   "stock_value_satang": 7000, "stock_value": 70.0}
+
+    sales = client.get("/stores/sales").json()
+    assert sales["total"] == {"sale_count": 1, "quantity": 2, "revenue_satang": 40000, "revenue": 400.0}
+    assert sales["stores"][0] == {"store_id": 1, "sale_count": 0, "quantity": 0,
+                                  "revenue_satang": 0, "revenue": 0.0}
+
+
+def test_legacy_db_gets_store_id_column(tmp_path, pos_db):
+    db_file = str(tmp_path / "legacy.db")
+    con = sqlite3.connect(db_file)
+    con.execute("CREATE TABLE product (id INTEGER PRIMARY KEY, name VARCHAR NOT NULL, sku VARCHAR NOT NULL, "
+                "category VARCHAR NOT NULL, price FLOAT NOT NULL, cost_price FLOAT NOT NULL, "
+                "stock INTEGER NOT NULL, image VARCHAR, has_vat BOOLEAN DEFAULT 0)")
+    con.execute("INSERT INTO product VALUES (1, 'TV', 'S', 'Tv', 1.0, 1.0, 1, NULL, 0)")
+    con.commit()
+    con.close()
+
+    pos_db(db_file)
+    with TestClient(main.app) as client:
+        assert client.get("/products/").json()[0]["store_id"] == 1
+
+
+def test_categories_span_all_stores(client):
+    client.get("/health")
+    main.app.state.seeder.join()
+    fan = next(c for c in client.get("/categories/").json() if c["name"] == "Fan")
+    add_product(client, 1, "Fan", stock=1)
+    add_product(client, 2, "Fan", stock=2)
+    add_product(client, 2, "Drone", stock=3)   # หมวดที่มีเฉพาะสาขา 2
+
+    client.put(f"/categories/{fan['id']}", json={"name": "Fans"})
+    assert {p["category"] for p in client.get("/products/", params={"store_id": 2}).json()} == {"Fans", "Drone"}
+    assert client.get("/products/").json()[0]["category"] == "Fans"
+
+    main.seed_defaults()
+    names = [c["name"] for c in client.get("/categories/").json()]
+    assert "Drone" in names and names.count("Fans") == 1
+
+    dashboard = client.get("/dashboard/inventory_by_category", params={"store_id": 2}).json()
+    by_name = {c["category_name"]: c for c in dashboard}
+    assert (by_name["Fans"]["total_stock"], by_name["Drone"]["total_stock"]) == (2, 3)
+    assert sum(c["total_stock"] for c in client.get("/dashboard/inventory_by_category").json()) == 1
+
+
+def test_legacy_sale_ids_are_not_reused(tmp_path, pos_db):
+    db_file = str(tmp_path / "legacy.db")
+    con = sqlite3.connect(db_file)
+    con.execute("CREATE TABLE product (id INTEGER PRIMARY KEY, name VARCHAR NOT NULL, sku VARCHAR NOT NULL, "
+                "category VARCHAR NOT NULL, price FLOAT NOT NULL, cost_price FLOAT NOT NULL, "
+                "stock INTEGER NOT NULL, image VARCHAR, has_vat BOOLEAN DEFAULT 0)")
+    con.execute("CREATE TABLE sale (id INTEGER PRIMARY KEY, product_id INTEGER NOT NULL, "
+                "product_name VARCHAR NOT NULL, quantity INTEGER NOT NULL, total_price FLOAT NOT NULL, "
+                "created_at DATETIME NOT NULL)")
+    con.execute("CREATE INDEX ix_sale_product_id ON sale (product_id)")
+    con.execute("INSERT INTO product VALUES (1, 'TV', 'S', 'Tv', 100.0, 80.0, 10, NULL, 0)")
+    con.executemany("INSERT INTO sale VALUES (?, 1, 'TV', 1, 100.0, '2024-01-01 10:00:00')", [(1,), (2,)])
+    con.commit()
+    con.close()
+
+    pos_db(db_file)
+    with TestClient(main.app) as client:
+        assert [s["total_price_satang"] for s in client.get("/sales/").json()] == [10000, 10000]
+        client.delete("/sales/2")
+        sale = {"product_id": 1, "product_name": "TV", "quantity": 1, "total_price": 100.0}
+        assert client.post("/sales/", json=sale).json()["id"] == 3
+
+    con = sqlite3.connect(db_file)
+    assert con.execute("SELECT sale_id FROM sale_void").fetchall() == [(2,)]
+    con.close()
+
+
+def test_category_rename_is_undone_when_a_store_fails(client):
+    client.get("/health")
+    main.app.state.seeder.join()
+    fan = next(c for c in client.get("/categories/").json() if c["name"] == "Fan")
+    add_product(client, 1, "Fan", stock=1)
+    add_product(client, 1, "Fans", stock=1)    # ใช้ชื่อใหม่อยู่ก่อนแล้ว → ต้องไม่ถูกย้อน
+    add_product(client, 2, "Fan", stock=2)
+    con = sqlite3.connect(store_db_file(main.sqlite_file_name, 2))
+    con.execute("CREATE TRIGGER fail BEFORE UPDATE ON product BEGIN SELECT RAISE(ABORT, 'disk full'); END")
+    con.commit()
+    con.close()
+
+    with pytest.raises(IntegrityError, match="disk full"):
+        client.put(f"/categories/{fan['id']}", json={"name": "Fans"})
+
+    assert any(c["name"] == "Fan" for c in client.get("/categories/").json())
+    assert [p["category"] for p in client.get("/products/").json()] == ["Fan", "Fans"]
+    assert [p["category"] for p in client.get("/products/", params={"store_id": 2}).json()] == ["Fan"]
@@ -0,0 +1,72 @@
+"""
+ทดสอบ SaleWriteQueue (group-commit) กับฐานข้อมูลชั่วคราว
+"""
+import time
+
+import pytest
+from fastapi import HTTPException
+from sqlmodel import SQLModel, Session, create_engine
+
+from models import Product, Sale
+from write_queue import SaleWriteQueue
+
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'queue.db'}", connect_args={"check_same_thread": False})
+    SQLModel.metadata.create_all(engine)
+    with Session(engine) as session:
+        session.add(Product(id=1, name="TV", sku="TV1", category="Tv", price=100.0, cost_price=80.0, stock=5))
+        session.commit()
+    return engine
+
+
+def make_sale(product_id=1, quantity=2):
+    return Sale(product_id=product_id, product_name="TV", quantity=quantity, total_price=100.0 * quantity)
+
+
+def test_batch_has_per_item_outcomes(engine):
+    q = SaleWriteQueue(engine, window_ms=200)
+    q.start()
+    try:
+        futures = [q.submit(make_sale()) for _ in range(3)]
+        futures.append(q.submit(make_sale(product_id=999)))
+        outcomes = []
+        for f in futures:
+            try:
+                outcomes.append(f.result(timeout=5))
+            except HTTPException as exc:
+                outcomes.append(exc.status_code)
+    finally:
+        q.stop()
+
+    assert [type(o) for o in outcomes[:2]] == [Sale, Sale]
+    assert outcomes[2:] == [400, 404]
+    assert outcomes[0].id != outcomes[1].id
+    # ทั้ง 4 รายการอยู่ใน window เดียว → commit ครั้งเดียว
+    assert q.commits == 1
+    assert q.items_written == 2
+
+    with Session(engine) as session:
+        assert session.get(Product, 1).stock == 1
+        assert len(session.exec(Sale.__table__.select()).all()) == 2
+
+
+def test_submit_requires_running_queue(engine):
+    q = SaleWriteQueue(engine)
+    with pytest.raises(RuntimeError):
+        q.submit(make_sale())
+
+
+def test_stop_during_window_flushes_and_exits(engine):
+    q = SaleWriteQueue(engine, window_ms=5000)
+    q.start()
+    thread = q._thread
+    future = q.submit(make_sale())
+    started = time.monotonic()
+    q.stop(timeout=5)
+
+    assert time.monotonic() - started < 1
+    assert not thread.is_alive()
+    assert future.result(timeout=0).quantity == 2
+    assert q.items_written == 1
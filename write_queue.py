@@ -0,0 +1,123 @@
+"""
+Group-commit write queue สำหรับการขาย (POST /sales/)
+
+SQLite เขียนได้ทีละ writer และทุก request ของ create_sale ต้อง commit + fsync เอง
+ช่วงคนเยอะ request จึงต่อคิวรอ commit ของกันและกัน
+
+SaleWriteQueue มี writer thread ตัวเดียว รวบ sale ที่เข้ามาภายใน window สั้น ๆ
+(ค่าเริ่มต้น 5ms) แล้ว commit เป็น transaction เดียว ผลลัพธ์แยกเป็นรายการ:
+รายการที่ไม่ผ่าน (ไม่มีสินค้า / สต๊อกไม่พอ) จะได้ HTTPException ของตัวเอง
+โดยไม่กระทบรายการอื่นใน batch เดียวกัน
+"""
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+from fastapi import HTTPException
+
+from fast_path import insert_sale
+from models import Sale
+
+
+class SaleWriteQueue:
+    def __init__(self, engine, window_ms: float = 5.0, max_batch: int = 200):
+        self.engine = engine
+        self.window = window_ms / 1000.0
+        self.max_batch = max_batch
+        self.commits = 0            # จำนวน transaction ที่ commit จริง
+        self.items_written = 0      # จำนวน sale ที่บันทึกสำเร็จ
+        self._queue = queue.Queue()
+        self._thread = None
+        self._stopping = threading.Event()
+
+    # --- lifecycle ---
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._run, name="sale-writer", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0):
+        if self._thread is None:
+            return
+        self._stopping.set()
+        self._queue.put(None)  # ปลุก writer ให้ออกจาก get()
+        self._thread.join(timeout)
+        self._thread = None
+
+    # --- API ---
+
+    def submit(self, sale: Sale) -> Future:
+        if self._thread is None:
+            raise RuntimeError("SaleWriteQueue is not running")
+        future = Future()
+        self._queue.put((sale, future))
+        return future
+
+    def create_sale(self, sale: Sale) -> Sale:
+        return self.submit(sale).result()
+
+    # --- writer thread ---
+
+    def _run(self):
+        while True:
+            first = self._queue.get()
+            if first is None:
+                if self._stopping.is_set() and self._queue.empty():
+                    return
+                continue
+            batch = [first]
+            stop_seen = False
+            deadline = time.monotonic() + self.window
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if item is None:
+                    # stop() ระหว่าง window → ไม่รอจนหมด window และห้ามทิ้ง sentinel
+                    stop_seen = True
+                    break
+                batch.append(item)
+            self._flush(batch)
+            if stop_seen and self._stopping.is_set():
+                if self._queue.empty():
+                    return
+                self._queue.put(None)  # ยังมีของค้าง → เขียนให้หมดก่อนแล้วค่อยเจอ sentinel อีกรอบ
+
+    def _flush(self, batch):
+        try:
+            with self.engine.begin() as conn:
+                outcomes = [self._apply(conn, sale) for sale, _ in batch]
+            self.commits += 1
+        except Exception:
+            # commit ทั้ง batch ไม่ผ่าน → ลองทีละรายการ เพื่อให้แต่ละคนได้ผลของตัวเอง
+            outcomes = []
+            for sale, _ in batch:
+                try:
+                    with self.engine.begin() as conn:
+                        outcomes.append(self._apply(conn, sale))
+                    self.commits += 1
+                except Exception as exc:
+                    outcomes.append(exc)
+
+        for (_, future), outcome in zip(batch, outcomes):
+            if isinstance(outcome, Exception):
+                future.set_exception(outcome)
+            else:
+                self.items_written += 1
+                future.set_result(outcome)
+
+    @staticmethod
+    def _apply(conn, sale: Sale):
+        """ตัดสต๊อก + บันทึก sale หนึ่งรายการ คืนค่า Sale หรือ HTTPException (ไม่ raise)"""
+        try:
+            return Sale(**insert_sale(conn, sale))
+        except HTTPException as exc:
+            return exc